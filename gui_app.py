@@ -1,5 +1,6 @@
 import os
 import sys
+import multiprocessing
 
 # --- Start of sys.path modification ---
 # Ensure lib_directory is added to sys.path absolutely first for this script's context
@@ -46,6 +47,7 @@ except ImportError as e:
 # Standard library imports (can come after lib imports if there are no further dependencies from lib back to them at import time)
 import cv2
 import threading
+import queue
 import json
 from tkinter import filedialog, messagebox, ttk # ttk should be here
 import tkinter as tk # tk is used in the except block above, so it's fine here or earlier
@@ -68,7 +70,7 @@ RULER_TEMPLATE_5CM_PATH_ASSET = resource_path(
 VALID_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff', '.bmp')
 RAW_IMAGE_EXTENSION = '.cr2'
 # DEFAULT_PHOTOGRAPHER is now imported
-TEMP_EXTRACTED_RULER_FOR_SCALING_FILENAME = "temp_isolated_ruler.tif"
+PROGRESS_POLL_MS = 33 # How often the Tk loop picks up progress posted by the workflow thread
 
 # CORRECTED: Ensure this matches the numeric mapping in stitch_config.STITCH_VIEW_PATTERNS_CONFIG
 # stitch_config.py has: top: _03, bottom: _04
@@ -364,6 +366,37 @@ class ImageProcessorApp:
     def update_progress_bar(self, value): self.progress_var.set(
         value); self.root.update_idletasks()
 
+    def post_progress(self, value):
+        """
+        Called from the workflow thread. Only the newest value is kept; the Tk loop draws
+        it on its next poll, so the workflow never waits on a redraw.
+        """
+        try:
+            self.progress_queue.get_nowait() # Drop a value that was not drawn yet
+        except queue.Empty:
+            pass
+        self.progress_queue.put_nowait(value)
+
+    def post_processing_finished(self):
+        """Called from the workflow thread; the Tk loop runs the finish handling."""
+        self.processing_done.set()
+
+    def _drain_progress(self):
+        """Draws the latest posted progress and finishes up once the workflow is done."""
+        try:
+            self.update_progress_bar(self.progress_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if self.processing_done.is_set():
+            # The last value may have been posted after the read above but before done was set
+            try:
+                self.update_progress_bar(self.progress_queue.get_nowait())
+            except queue.Empty:
+                pass
+            self.processing_finished_ui_update()
+        else:
+            self.root.after(PROGRESS_POLL_MS, self._drain_progress)
+
     def processing_finished_ui_update(self):
         self.prb.config(state=tk.NORMAL)
         messagebox.showinfo("Processing Complete", "Workflow finished.")
@@ -394,6 +427,9 @@ class ImageProcessorApp:
         print(f"Starting processing with {ms} ruler...\n")
         self.prb.config(state=tk.DISABLED)
         self.update_progress_bar(0)
+        self.progress_queue = queue.Queue(maxsize=1)
+        self.processing_done = threading.Event()
+        self.root.after(PROGRESS_POLL_MS, self._drain_progress)
 
         threading.Thread(target=run_complete_image_processing_workflow,
                          args=(
@@ -409,10 +445,9 @@ class ImageProcessorApp:
                              RULER_TEMPLATE_2CM_PATH_ASSET,
                              RULER_TEMPLATE_5CM_PATH_ASSET,
                              GUI_VIEW_ORIGINAL_SUFFIX_PATTERNS,
-                             TEMP_EXTRACTED_RULER_FOR_SCALING_FILENAME,
                              OBJECT_ARTIFACT_SUFFIX,
-                             self.update_progress_bar,
-                             self.processing_finished_ui_update,
+                             self.post_progress,
+                             self.post_processing_finished,
                              self.museum_var.get(),
                              self.root # ADDED: Pass the main app window as parent for dialogs
                          ),
@@ -420,6 +455,8 @@ class ImageProcessorApp:
 
 
 if __name__ == "__main__":
+    # Subfolders are processed in worker processes; needed for the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     modules_to_check = {
         "resize_ruler_module": resize_ruler,
         "ruler_detector_module": ruler_detector,
@@ -1,19 +1,25 @@
 import tkinter as tk
 from tkinter import messagebox
 
+from lib.complex_layout_layout_drawing import display_image_in_rectangle
+from lib.complex_layout_sequence_manager import update_sequence_indicator
+
+# The empty layout: main slots hold one image (or None), intermediate slots hold a sequence
+_DEFAULT_LAYOUT_TEMPLATE = {
+    "obverse": None, "reverse": None,
+    "top": None, "bottom": None, "left": None, "right": None,
+    "intermediate_obverse_top": [], "intermediate_obverse_bottom": [],
+    "intermediate_obverse_left": [], "intermediate_obverse_right": [],
+    "intermediate_reverse_top": [], "intermediate_reverse_bottom": [],
+    "intermediate_reverse_left": [], "intermediate_reverse_right": [],
+}
+
 def get_default_layout_structure():
     """
-    Provides the initial empty layout.
+    Provides the initial empty layout, with fresh sequence lists on every call.
     This method should be called by ComplexLayoutDialog.
     """
-    return {
-        "obverse": None, "reverse": None,
-        "top": None, "bottom": None, "left": None, "right": None,
-        "intermediate_obverse_top": [], "intermediate_obverse_bottom": [],
-        "intermediate_obverse_left": [], "intermediate_obverse_right": [],
-        "intermediate_reverse_top": [], "intermediate_reverse_bottom": [],
-        "intermediate_reverse_left": [], "intermediate_reverse_right": [],
-    }
+    return {key: ([] if isinstance(value, list) else None) for key, value in _DEFAULT_LAYOUT_TEMPLATE.items()}
 
 def load_current_layout_into_ui(self):
     """
@@ -31,31 +37,33 @@ def load_current_layout_into_ui(self):
                 if not self.layout_rectangles[slot_name]["is_sequence"]:
                     # This is a main slot
                     self.layout_rectangles[slot_name]["current_image"] = img_path
-                    self._display_image_in_rectangle(slot_name, img_path)
+                    display_image_in_rectangle(self, slot_name, img_path)
                     # Hide from available list
-                    if img_path in self.available_labels:
-                        self.available_labels[img_path].master.pack_forget()
+                    self._hide_available_image(img_path)
             elif isinstance(assigned_value, list): # Sequence slots
                 # For sequences, we need to ensure images are hidden and indicators updated
                 for item in assigned_value: # Each item is a dict: {"path": ..., "rotation": ...}
                     img_path = item["path"]
                     rotation = item.get("rotation", 0)
                     self.image_rotations[img_path] = rotation # Ensure rotation is loaded
-                    if img_path in self.available_labels:
-                        self.available_labels[img_path].master.pack_forget()
-                    
-        # After processing all assignments, refresh available images to reflect hidden ones
-        self._populate_available_images()
+                    self._hide_available_image(img_path)
         
         # Update sequence indicators
         for slot_key in self.layout_rectangles:
             if "intermediate" in slot_key:
-                self._update_sequence_indicator(slot_key)
-    
-    # Initial populating of available images needs to happen after rotations are loaded
-    # so that correct thumbnails are prepared.
-    self._populate_available_images()
+                update_sequence_indicator(self, slot_key)
+    # The available list was built in _setup_ui and only toggles entries from here on;
+    # its thumbnails load lazily, so they pick up the rotations restored above.
+
 
+def _release_image_caches(self):
+    """Drops cached PhotoImages and stops background thumbnail work before the dialog is destroyed."""
+    self.thumbnail_executor.shutdown(wait=False)
+    for future in self.preload_futures:
+        future.cancel()
+    self.preload_executor.shutdown(wait=False)
+    self.slot_photo_cache.clear()
+    self.image_size_cache.clear()
 
 def on_ok(self):
     """
@@ -73,24 +81,22 @@ def on_ok(self):
                     "rotation": self.image_rotations.get(img_path, 0)
                 }
         else: # Sequence slots
-            sequence_paths = self.result_layout.get(slot_name, [])
             final_layout[slot_name] = [
-                {"path": path, "rotation": self.image_rotations.get(path, 0)}
-                for path in sequence_paths
+                {"path": item["path"], "rotation": self.image_rotations.get(item["path"], 0)}
+                for item in self.result_layout.get(slot_name, [])
             ]
-    
-    self.result_layout = final_layout # Update the result layout with paths and rotations
 
-    # Validate main views (obverse and reverse)
+    # Validate main views (obverse and reverse). result_layout is only replaced once the
+    # layout is accepted, so the dialog stays consistent if the user goes back to edit it.
     main_faces = {"obverse": False, "reverse": False}
-    if self.result_layout.get("obverse") and self.result_layout["obverse"]["path"]:
+    if final_layout.get("obverse") and final_layout["obverse"]["path"]:
         main_faces["obverse"] = True
-    if self.result_layout.get("reverse") and self.result_layout["reverse"]["path"]:
+    if final_layout.get("reverse") and final_layout["reverse"]["path"]:
         main_faces["reverse"] = True
 
     # Check if there are any assignments at all
     has_any_assignment = False
-    for key, value in self.result_layout.items():
+    for key, value in final_layout.items():
         if isinstance(value, list) and value:  # Sequence slots
             has_any_assignment = True
             break
@@ -124,7 +130,7 @@ def on_ok(self):
             f"intermediate_{face}_left",
             f"intermediate_{face}_right"
         ]
-        has_intermediates_for_face = any(self.result_layout.get(key) for key in intermediate_keys_for_face)
+        has_intermediates_for_face = any(final_layout.get(key) for key in intermediate_keys_for_face)
         
         if has_intermediates_for_face and not main_faces[face]:
             messagebox.showwarning(
@@ -134,13 +140,35 @@ def on_ok(self):
             )
             return
 
-    # If all validations pass, close the dialog
+    # If all validations pass, keep the layout and close the dialog
+    self.result_layout = final_layout # Paths with their final rotations
+    _release_image_caches(self)
     self.destroy()
 
+def get_layout_config(self):
+    """
+    Returns the accepted layout in the form the stitching workflow consumes: a path (or None)
+    per main view and a list of paths per sequence. Returns None if the dialog was cancelled.
+    Rotations stay in result_layout; the stitching steps do not apply them.
+    This method should be called by ComplexLayoutDialog.
+    """
+    if self.result_layout is None:
+        return None
+    layout_config = {}
+    for key, value in self.result_layout.items():
+        if isinstance(value, list):
+            layout_config[key] = [item["path"] for item in value]
+        elif isinstance(value, dict):
+            layout_config[key] = value.get("path")
+        else:
+            layout_config[key] = None
+    return layout_config
+
 def on_cancel(self):
     """
     Handles the cancellation of the dialog.
     This method should be called by ComplexLayoutDialog.
     """
     self.result_layout = None  # Indicate cancellation
+    _release_image_caches(self)
     self.destroy()
\ No newline at end of file
@@ -1,47 +1,208 @@
 import os
 import math
+import hashlib
+import threading
+import concurrent.futures
 import tkinter as tk
 from tkinter import messagebox
 from PIL import Image, ImageTk, ImageDraw
 
+THUMBNAIL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ebl-stitcher", "thumbs")
+THUMBNAIL_CACHE_BUCKET_PX = 32
+THUMBNAIL_CACHE_JPEG_QUALITY = 85
+THUMBNAIL_CACHE_MAX_BYTES = 256 * 1024 * 1024 # Least recently used files are pruned above this
+
+# Quarter turns are exact pixel shuffles, so they skip the affine resampler
+ORTHOGONAL_TRANSPOSES = {
+    90: Image.Transpose.ROTATE_90,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_270,
+}
+
+def _decode_list_thumbnail(img_path, rotation, thumbnail_size):
+    """Worker for prepare_thumbnails: returns the rotated thumbnail, or a placeholder if it can't be read."""
+    try:
+        # Applies the initial rotation if loaded from an existing layout or previously
+        # rotated; reopening the same tablet reads the result from the disk cache
+        return disk_cached_thumbnail(img_path, rotation, thumbnail_size)
+    except Exception as e:
+        print(f"Error loading thumbnail for {img_path}: {e}")
+        error_img = Image.new('RGB', thumbnail_size, color = 'lightgrey')
+        try:
+            draw = ImageDraw.Draw(error_img)
+            draw.text((5, 5), "Error", fill="red")
+        except Exception:
+            pass
+        return error_img
+
 def prepare_thumbnails(self):
     """
     Handles loading, resizing, and caching PIL and Tkinter images.
+    Decoding runs on a thread pool (PIL releases the GIL while decoding); the
+    PhotoImages are created later on the Tk thread.
+    This method should be called by ComplexLayoutDialog.
+    """
+    self.preload_futures.append(self.preload_executor.submit(prune_thumbnail_cache))
+    rotations = [self.image_rotations.get(img_path, 0) for img_path in self.image_paths]
+    max_workers = min(8, os.cpu_count() or 4, max(1, len(self.image_paths)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        thumbnails = executor.map(_decode_list_thumbnail, self.image_paths, rotations,
+                                  [self.thumbnail_size] * len(self.image_paths))
+        for img_path, rotation, image in zip(self.image_paths, rotations, thumbnails):
+            self.pil_images_cache[_rotation_key(self, img_path, rotation)] = image
+
+def _rotation_key(self, img_path, rotation=None):
+    """Cache key for an image at a rotation (defaults to its current rotation)."""
+    if rotation is None:
+        rotation = self.image_rotations.get(img_path, 0)
+    return (img_path, rotation % 360)
+
+def _trim_cache(self, cache):
+    """Evicts the oldest entries once a cache holds more than four rotations per image."""
+    limit = 4 * max(1, len(self.image_paths))
+    while len(cache) > limit:
+        del cache[next(iter(cache))]
+
+def pil_thumbnail(self, img_path, rotation=None):
+    """
+    Returns the list-size PIL thumbnail for an image at a rotation, creating it on first use.
     This method should be called by ComplexLayoutDialog.
     """
-    for img_path in self.image_paths:
+    key = _rotation_key(self, img_path, rotation)
+    if key not in self.pil_images_cache:
+        # Quarter turns are lossless, so a cached thumbnail at another rotation can be
+        # transposed into this one instead of decoding the original again
+        for delta in (90, 180, 270):
+            cached = self.pil_images_cache.get((img_path, (key[1] - delta) % 360))
+            if cached is not None:
+                self.pil_images_cache[key] = cached.transpose(ORTHOGONAL_TRANSPOSES[delta])
+                break
+        else:
+            self.pil_images_cache[key] = disk_cached_thumbnail(img_path, key[1], self.thumbnail_size)
+        _trim_cache(self, self.pil_images_cache)
+    return self.pil_images_cache[key]
+
+def _rotated_thumbnail(img_path, rotation, size):
+    """
+    Opens img_path and returns a thumbnail fitting size after rotation.
+    The image is shrunk in its source orientation first and only the small result
+    is rotated, so the full-resolution image is never rotated.
+    """
+    source_box = (size[1], size[0]) if rotation % 180 == 90 else size
+    with Image.open(img_path) as image:
+        # Let the JPEG decoder scale down by 1/2, 1/4 or 1/8 while decoding (no-op for other formats)
+        image.draft("RGB", source_box)
+        image.load()
+        # Integer box-reduce by a power of two to within 2x of the target, so LANCZOS
+        # only handles the remaining fractional step
+        if image.mode in ("L", "RGB", "RGBA"):
+            scale = min(image.width / source_box[0], image.height / source_box[1])
+            factor = 1
+            while factor * 2 <= scale:
+                factor *= 2
+            if factor >= 2:
+                image = image.reduce(factor)
+        image.thumbnail(source_box, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    transpose_op = ORTHOGONAL_TRANSPOSES.get(rotation % 360)
+    if transpose_op is not None:
+        image = image.transpose(transpose_op)
+    elif rotation % 360 != 0:
+        image = image.rotate(rotation, expand=True, resample=Image.Resampling.BILINEAR)
+    return image
+
+def _bucket_size(max_wh):
+    """Rounds a requested size up to the cache bucket so nearby sizes share an entry."""
+    return tuple(max(THUMBNAIL_CACHE_BUCKET_PX, -(-int(v) // THUMBNAIL_CACHE_BUCKET_PX) * THUMBNAIL_CACHE_BUCKET_PX)
+                 for v in max_wh)
+
+def prune_thumbnail_cache(max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+    """Deletes the least recently used cached thumbnails until the cache fits in max_bytes."""
+    try:
+        entries = [entry for entry in os.scandir(THUMBNAIL_CACHE_DIR)
+                   if entry.name.endswith(".jpg") and entry.is_file()]
+    except OSError:
+        return # No cache yet
+    
+    files = []
+    for entry in entries:
         try:
-            # Always load fresh PIL image for rotation handling
-            image = Image.open(img_path)
-            # Apply initial rotation if loaded from existing layout or previously rotated
-            if self.image_rotations.get(img_path):
-                image = image.rotate(self.image_rotations[img_path], expand=True)
-
-            image.thumbnail(self.thumbnail_size, Image.Resampling.LANCZOS)
-            self.pil_images_cache[img_path] = image
+            stat = entry.stat()
+        except OSError:
+            continue
+        # Hits touch the file's mtime, which also works on noatime mounts
+        files.append((max(stat.st_atime, stat.st_mtime), stat.st_size, entry.path))
+    
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError as e:
+            print(f"Warning: Could not prune cached thumbnail {path}: {e}")
+
+def disk_cached_thumbnail(img_path, rotation, max_wh):
+    """
+    Returns a rotated PIL thumbnail fitting max_wh, backed by an on-disk JPEG cache
+    keyed by (path, mtime, rotation, bucketed size). Takes no dialog, so it can be
+    submitted to worker threads directly.
+    """
+    bucket = _bucket_size(max_wh)
+    abs_path = os.path.abspath(img_path)
+    cache_path = None
+    try:
+        cache_key = f"{abs_path}|{os.stat(abs_path).st_mtime_ns}|{rotation}|{bucket[0]}x{bucket[1]}"
+        cache_path = os.path.join(THUMBNAIL_CACHE_DIR, hashlib.sha1(cache_key.encode("utf-8")).hexdigest() + ".jpg")
+    except OSError as e:
+        print(f"Warning: Could not stat {img_path} for thumbnail cache: {e}")
+
+    thumbnail = None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            thumbnail = Image.open(cache_path)
+            thumbnail.load()
         except Exception as e:
-            print(f"Error loading thumbnail for {img_path}: {e}")
-            error_img = Image.new('RGB', self.thumbnail_size, color = 'lightgrey')
+            print(f"Warning: Ignoring unreadable cached thumbnail {cache_path}: {e}")
+            thumbnail = None
+        else:
             try:
-                draw = ImageDraw.Draw(error_img)
-                draw.text((5, 5), "Error", fill="red")
-            except Exception:
+                os.utime(cache_path) # Mark as recently used for prune_thumbnail_cache
+            except OSError:
                 pass
-            self.pil_images_cache[img_path] = error_img
 
-def add_rotate_overlay(self, img):
+    if thumbnail is None:
+        thumbnail = _rotated_thumbnail(img_path, rotation, bucket)
+        if thumbnail.mode != "RGB":
+            thumbnail = thumbnail.convert("RGB")
+        if cache_path:
+            try:
+                os.makedirs(THUMBNAIL_CACHE_DIR, exist_ok=True)
+                # Write then rename, so a reader on another thread never sees a partial file
+                temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                thumbnail.save(temp_path, "JPEG", quality=THUMBNAIL_CACHE_JPEG_QUALITY)
+                os.replace(temp_path, cache_path)
+            except Exception as e:
+                print(f"Warning: Could not write thumbnail cache for {img_path}: {e}")
+
+    # The cached bucket is at least as large as requested; finish with a cheap resize
+    thumbnail.thumbnail(max_wh, Image.Resampling.LANCZOS)
+    return thumbnail
+
+_rotate_overlay_sprites = {} # circle radius -> RGBA overlay sprite
+
+def _rotate_overlay_sprite(circle_radius):
     """
-    Adds a circular arrow overlay to the top-right corner of an image.
-    This method should be called by ComplexLayoutDialog.
+    Draws the circular-arrow rotate overlay once per radius as an RGBA sprite.
+    The circle centre sits at (margin, margin); the arrowhead may reach past the circle.
     """
-    img_copy = img.copy()
-    draw = ImageDraw.Draw(img_copy)
-    
-    # Define the circle size and position (top-right corner)
-    # Use a larger circle radius - minimum 24 pixels or relative to image size
-    circle_radius = max(24, min(img_copy.width, img_copy.height) // 8)
-    circle_x = img_copy.width - circle_radius - 8  # 8 pixels from right edge
-    circle_y = circle_radius + 8  # 8 pixels from top edge
+    if circle_radius in _rotate_overlay_sprites:
+        return _rotate_overlay_sprites[circle_radius]
+
+    margin = int(circle_radius * 1.3) + 2
+    sprite = Image.new("RGBA", (2 * margin + 1, 2 * margin + 1), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(sprite)
+    circle_x = circle_y = margin
     
     # Draw circular background with higher contrast and better opacity
     draw.ellipse(
@@ -69,7 +230,7 @@ def add_rotate_overlay(self, img):
     # Draw the circular path with thicker lines for better visibility
     if len(arrow_points) >= 2:
         for i in range(len(arrow_points) - 1):
-            draw.line([arrow_points[i], arrow_points[i+1]], fill=(255, 255, 255), width=max(3, circle_radius // 8))
+            draw.line([arrow_points[i], arrow_points[i+1]], fill=(255, 255, 255, 255), width=max(3, circle_radius // 8))
     
     # Draw a larger, more visible arrowhead at the end
     arrowhead_size = circle_radius // 2
@@ -93,7 +254,28 @@ def add_rotate_overlay(self, img):
          last_point[1] + int((arrowhead_size/2) * math.sin(perp_angle1))),  # Side point 1
         (last_point[0] + int((arrowhead_size/2) * math.cos(perp_angle2)), 
          last_point[1] + int((arrowhead_size/2) * math.sin(perp_angle2))),  # Side point 2
-    ], fill=(255, 255, 255))
+    ], fill=(255, 255, 255, 255))
+    
+    _rotate_overlay_sprites[circle_radius] = sprite
+    return sprite
+
+def add_rotate_overlay(self, img):
+    """
+    Adds a circular arrow overlay to the top-right corner of an image.
+    The overlay is drawn once per size and alpha-pasted onto each thumbnail.
+    This method should be called by ComplexLayoutDialog.
+    """
+    img_copy = img.copy()
+    
+    # Define the circle size and position (top-right corner)
+    # Use a larger circle radius - minimum 24 pixels or relative to image size
+    circle_radius = max(24, min(img_copy.width, img_copy.height) // 8)
+    circle_x = img_copy.width - circle_radius - 8  # 8 pixels from right edge
+    circle_y = circle_radius + 8  # 8 pixels from top edge
+    
+    sprite = _rotate_overlay_sprite(circle_radius)
+    margin = sprite.width // 2
+    img_copy.paste(sprite, (circle_x - margin, circle_y - margin), sprite)
     
     return img_copy
 
@@ -104,27 +286,31 @@ def get_tk_thumbnail(self, img_path, size=None, add_rotate_icon=True):
     """
     if size is None:
         size = self.thumbnail_size
-    cache_key = (img_path, size, self.image_rotations.get(img_path, 0), add_rotate_icon) # Include rotation in cache key
+    rotation = self.image_rotations.get(img_path, 0) % 360
+    cache_key = (img_path, size, rotation, add_rotate_icon) # Include rotation in cache key
     
     if cache_key not in self.tk_thumbnails_cache:
-        if img_path in self.pil_images_cache:
-            pil_image = Image.open(img_path) # Re-open original image
-            rotation_degrees = self.image_rotations.get(img_path, 0)
-            if rotation_degrees != 0:
-                pil_image = pil_image.rotate(rotation_degrees, expand=True) # Apply rotation
-            
-            pil_image.thumbnail(size, Image.Resampling.LANCZOS) # Resize for thumbnail            # Add rotate overlay if requested
-            if add_rotate_icon:
-                # Use the function directly instead of through self
-                # Make sure we have imported math for the circular calculations
-                try:
-                    pil_image = add_rotate_overlay(self, pil_image)
-                except Exception as e:
-                    print(f"Error adding rotate overlay: {e}")
-            
-            self.tk_thumbnails_cache[cache_key] = ImageTk.PhotoImage(pil_image)
-        else:
+        try:
+            if size == self.thumbnail_size:
+                # The list-size thumbnail for this rotation is already kept as a PIL image
+                pil_image = pil_thumbnail(self, img_path, rotation)
+            else:
+                # Re-open original image, resize for thumbnail and apply rotation
+                pil_image = _rotated_thumbnail(img_path, rotation, size)
+        except Exception as e:
+            print(f"Error creating thumbnail for {img_path}: {e}")
             return None
+        # Add rotate overlay if requested
+        if add_rotate_icon:
+            # Use the function directly instead of through self
+            # Make sure we have imported math for the circular calculations
+            try:
+                pil_image = add_rotate_overlay(self, pil_image)
+            except Exception as e:
+                print(f"Error adding rotate overlay: {e}")
+        
+        self.tk_thumbnails_cache[cache_key] = ImageTk.PhotoImage(pil_image)
+        _trim_cache(self, self.tk_thumbnails_cache)
     return self.tk_thumbnails_cache[cache_key]
 
 def rotate_image(self, img_path):
@@ -132,48 +318,34 @@ def rotate_image(self, img_path):
     Handles rotation logic and updates UI.
     This method should be called by ComplexLayoutDialog.
     """
+    # Imported here: both modules import from this one
+    from lib.complex_layout_layout_drawing import display_image_in_rectangle
+    from lib.complex_layout_undo_manager import record_action
+
     current_rotation = self.image_rotations.get(img_path, 0)
     new_rotation = (current_rotation + 90) % 360
     self.image_rotations[img_path] = new_rotation
     
     try:
-        # Always re-open the original image to avoid quality loss from multiple rotations
-        original_image = Image.open(img_path)
-        
-        # Apply the full rotation in one step
-        if new_rotation != 0:
-            rotated_image = original_image.rotate(new_rotation, expand=True, resample=Image.Resampling.BICUBIC)
-        else:
-            rotated_image = original_image.copy()
-            
-        # Create a thumbnail version for the cache
-        thumbnail_copy = rotated_image.copy()
-        thumbnail_copy.thumbnail(self.thumbnail_size, Image.Resampling.LANCZOS)
-        
-        # Update the cache with the new thumbnail
-        self.pil_images_cache[img_path] = thumbnail_copy
-        
+        # Thumbnails are cached per (path, rotation), so cycling back to an earlier
+        # rotation is a lookup; otherwise the original is re-opened and rotated in one step
+        pil_thumbnail(self, img_path, new_rotation)
     except Exception as e:
         print(f"Error rotating image {img_path}: {e}")
     
-    # Clear ALL thumbnail cache entries for this image to force re-generation
-    keys_to_delete = [k for k in self.tk_thumbnails_cache if k[0] == img_path]
-    for k in keys_to_delete:
-        del self.tk_thumbnails_cache[k]
-    
     # Update the thumbnail in the available images list
-    self._populate_available_images() # Re-populate to refresh all thumbnails
+    self._refresh_available_thumbnail(img_path)
     
     # If the image is currently assigned to any slots, update all of them
     # Modified to update all slots that might use this image
     updated_slots = []
     for slot_name, rect_data in self.layout_rectangles.items():
         if rect_data["current_image"] == img_path:
-            self._display_image_in_rectangle(slot_name, img_path)
+            display_image_in_rectangle(self, slot_name, img_path)
             updated_slots.append(slot_name)
     
     # Record action for undo
-    self._record_action("rotate", img_path, current_rotation, new_rotation)
+    record_action(self, "rotate", img_path, current_rotation, new_rotation)
     
     if updated_slots:
         self.status_bar.config(text=f"Rotated {os.path.basename(img_path)} by 90° in {', '.join(updated_slots)}.")
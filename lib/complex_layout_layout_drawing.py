@@ -1,15 +1,47 @@
 import tkinter as tk
+from dataclasses import dataclass
 from PIL import Image, ImageTk
 
-def create_layout_visualization(self):
-    """
-    Defines and draws the layout rectangles on the canvas.
-    This method should be called by ComplexLayoutDialog.
-    """
-    canvas_width = 750 # Adjusted for better spacing
-    canvas_height = 650 # Adjusted for better spacing
-    self.layout_canvas.config(width=canvas_width, height=canvas_height)
-    
+from lib.complex_layout_image_utils import disk_cached_thumbnail
+
+THUMBNAIL_POLL_MS = 20 # How often the Tk loop checks for finished background thumbnails
+SLOT_PHOTO_CACHE_SIZE = 64 # Slot PhotoImages kept for quick redisplay after undo or reassignment
+
+_INTERMEDIATES = [("obverse", "top"), ("obverse", "bottom"), ("obverse", "left"), ("obverse", "right"),
+                  ("reverse", "top"), ("reverse", "bottom")]
+
+# Indicator rectangle for each parent edge, as a function of the parent coords
+_EDGE_OFFSETS = {
+    "top": lambda x1, y1, x2, y2, oi: (x1, y1 - oi - 5, x1 + 100, y1 - 5),
+    "bottom": lambda x1, y1, x2, y2, oi: (x1, y2 + 5, x1 + 100, y2 + oi + 5),
+    "left": lambda x1, y1, x2, y2, oi: (x1 - oi - 5, y1, x1 - 5, y1 + 100),
+    "right": lambda x1, y1, x2, y2, oi: (x2 + 5, y1, x2 + oi + 5, y1 + 100),
+}
+
+def _offset_edge(parent_coords, edge, oi_size):
+    """Returns (x1, y1, x2, y2) of an intermediate sequence indicator next to its parent view."""
+    return _EDGE_OFFSETS[edge](*parent_coords, oi_size)
+
+LAYOUT_CANVAS_WIDTH = 750 # Adjusted for better spacing
+LAYOUT_CANVAS_HEIGHT = 650 # Adjusted for better spacing
+
+@dataclass(frozen=True)
+class LayoutSlot:
+    """Static geometry of one rectangle in the layout visualization."""
+    __slots__ = ("name", "label", "x1", "y1", "x2", "y2")
+    name: str
+    label: str
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+
+    @property
+    def coords(self):
+        return (self.x1, self.y1, self.x2, self.y2)
+
+def _build_layout_slots():
+    """Computes the layout rectangles once; the canvas size is fixed."""
     padding = 20 # Increased padding
     central_size = 200 # Increased central size
     side_width = 60 # Increased side width
@@ -18,64 +50,95 @@ def create_layout_visualization(self):
     top_bottom_height = 60 # Increased top/bottom height
     
     # Center point calculation
-    center_x = canvas_width / 2
-    center_y = canvas_height / 2 
+    center_x = LAYOUT_CANVAS_WIDTH / 2
+    center_y = LAYOUT_CANVAS_HEIGHT / 2 
     
     # Define coordinates for main views and their labels
-    layout_elements = {
-        "obverse": {"coords": (center_x - central_size/2, center_y - central_size/2, 
-                               center_x + central_size/2, center_y + central_size/2), 
-                    "label": "Obverse"},
+    main_slots = [
+        LayoutSlot("obverse", "Obverse",
+                   center_x - central_size/2, center_y - central_size/2, 
+                   center_x + central_size/2, center_y + central_size/2),
         
-        "reverse": {"coords": (center_x - central_size/2, center_y + central_size/2 + padding, 
-                               center_x + central_size/2, center_y + central_size/2 + padding + central_size), 
-                    "label": "Reverse"},
+        LayoutSlot("reverse", "Reverse",
+                   center_x - central_size/2, center_y + central_size/2 + padding, 
+                   center_x + central_size/2, center_y + central_size/2 + padding + central_size),
         
-        "left": {"coords": (center_x - central_size/2 - padding - side_width, center_y - side_height/2, 
-                            center_x - central_size/2 - padding, center_y + side_height/2), 
-                 "label": "Left"},
+        LayoutSlot("left", "Left",
+                   center_x - central_size/2 - padding - side_width, center_y - side_height/2, 
+                   center_x - central_size/2 - padding, center_y + side_height/2),
         
-        "right": {"coords": (center_x + central_size/2 + padding, center_y - side_height/2, 
-                             center_x + central_size/2 + padding + side_width, center_y + side_height/2), 
-                  "label": "Right"},
+        LayoutSlot("right", "Right",
+                   center_x + central_size/2 + padding, center_y - side_height/2, 
+                   center_x + central_size/2 + padding + side_width, center_y + side_height/2),
         
-        "top": {"coords": (center_x - top_bottom_width/2, center_y - central_size/2 - padding - top_bottom_height, 
-                            center_x + top_bottom_width/2, center_y - central_size/2 - padding), 
-                "label": "Top"},
+        LayoutSlot("top", "Top",
+                   center_x - top_bottom_width/2, center_y - central_size/2 - padding - top_bottom_height, 
+                   center_x + top_bottom_width/2, center_y - central_size/2 - padding),
         
-        "bottom": {"coords": (center_x - top_bottom_width/2, center_y + central_size/2 + padding*2 + central_size, 
-                              center_x + top_bottom_width/2, center_y + central_size/2 + padding*2 + central_size + top_bottom_height), 
-                   "label": "Bottom"},
-    }
+        LayoutSlot("bottom", "Bottom",
+                   center_x - top_bottom_width/2, center_y + central_size/2 + padding*2 + central_size, 
+                   center_x + top_bottom_width/2, center_y + central_size/2 + padding*2 + central_size + top_bottom_height),
+    ]
+    main_by_name = {slot.name: slot for slot in main_slots}
     
-    # Intermediate sequence indicators
+    # Intermediate sequence indicators, placed along an edge of their parent view
     oi_size = 30 
+    intermediate_slots = [
+        LayoutSlot(f"intermediate_{parent}_{edge}", f"{parent[0].upper()}-{edge.capitalize()} Seq",
+                   *_offset_edge(main_by_name[parent].coords, edge, oi_size))
+        for parent, edge in _INTERMEDIATES
+    ]
+    return tuple(main_slots + intermediate_slots)
+
+_LAYOUT_SLOTS = _build_layout_slots()
+
+def _fit_size(image_size, rotation, box_width, box_height):
+    """Returns the (width, height) of an image rotated by rotation and scaled to fit the box."""
+    original_width, original_height = image_size
+    if rotation % 180 == 90:
+        original_width, original_height = original_height, original_width
     
-    layout_elements.update({
-        "intermediate_obverse_top": {"coords": (layout_elements["obverse"]["coords"][0], layout_elements["obverse"]["coords"][1] - oi_size - 5, 
-                                                layout_elements["obverse"]["coords"][0] + 100, layout_elements["obverse"]["coords"][1] - 5), 
-                                     "label": "O-Top Seq"},
-        "intermediate_obverse_bottom": {"coords": (layout_elements["obverse"]["coords"][0], layout_elements["obverse"]["coords"][3] + 5, 
-                                                   layout_elements["obverse"]["coords"][0] + 100, layout_elements["obverse"]["coords"][3] + oi_size + 5), 
-                                        "label": "O-Bottom Seq"},
-        "intermediate_obverse_left": {"coords": (layout_elements["obverse"]["coords"][0] - oi_size - 5, layout_elements["obverse"]["coords"][1], 
-                                                 layout_elements["obverse"]["coords"][0] - 5, layout_elements["obverse"]["coords"][1] + 100), 
-                                       "label": "O-Left Seq"},
-        "intermediate_obverse_right": {"coords": (layout_elements["obverse"]["coords"][2] + 5, layout_elements["obverse"]["coords"][1], 
-                                                  layout_elements["obverse"]["coords"][2] + oi_size + 5, layout_elements["obverse"]["coords"][1] + 100), 
-                                        "label": "O-Right Seq"},
-        
-        "intermediate_reverse_top": {"coords": (layout_elements["reverse"]["coords"][0], layout_elements["reverse"]["coords"][1] - oi_size - 5, 
-                                                layout_elements["reverse"]["coords"][0] + 100, layout_elements["reverse"]["coords"][1] - 5), 
-                                     "label": "R-Top Seq"},
-        "intermediate_reverse_bottom": {"coords": (layout_elements["reverse"]["coords"][0], layout_elements["reverse"]["coords"][3] + 5, 
-                                                   layout_elements["reverse"]["coords"][0] + 100, layout_elements["reverse"]["coords"][3] + oi_size + 5), 
-                                        "label": "R-Bottom Seq"},
-    })
+    # Calculate scaling factor
+    width_ratio = box_width / original_width
+    height_ratio = box_height / original_height
+    
+    fit_ratio = min(width_ratio, height_ratio)
+    
+    return int(original_width * fit_ratio), int(original_height * fit_ratio)
+
+def _warm_slot_thumbnail(img_path, rotation, box_width, box_height):
+    """Worker-thread task: writes the disk-cached thumbnail an image would get in a slot of this size."""
+    with Image.open(img_path) as pil_image:
+        image_size = pil_image.size
+    disk_cached_thumbnail(img_path, rotation, _fit_size(image_size, rotation, box_width, box_height))
+
+def preload_slot_thumbnails(self):
+    """
+    Warms the on-disk thumbnail cache for every image in the dialog at the size of the
+    obverse/reverse slots, so the first assignment is a cache hit. Only PIL work runs in
+    the background; PhotoImages are still built on the Tk thread when displayed.
+    This method should be called by ComplexLayoutDialog.
+    """
+    main_slot = next(slot for slot in _LAYOUT_SLOTS if slot.name == "obverse")
+    box_width = main_slot.x2 - main_slot.x1
+    box_height = main_slot.y2 - main_slot.y1 - 20 # Same label allowance as display_image_in_rectangle
+    for img_path, rotation in list(self.image_rotations.items()):
+        self.preload_futures.append(
+            self.preload_executor.submit(_warm_slot_thumbnail, img_path, rotation, box_width, box_height))
+
+def create_layout_visualization(self):
+    """
+    Defines and draws the layout rectangles on the canvas.
+    This method should be called by ComplexLayoutDialog.
+    """
+    self.layout_canvas.config(width=LAYOUT_CANVAS_WIDTH, height=LAYOUT_CANVAS_HEIGHT)
 
     self.layout_rectangles = {}
-    for slot_name, data in layout_elements.items():
-        add_labeled_rectangle(self, slot_name, *data["coords"], custom_label=data["label"])
+    self._canvas_item_to_slot = {} # Canvas item id -> slot name, for the canvas-level click handler
+    for slot in _LAYOUT_SLOTS:
+        add_labeled_rectangle(self, slot.name, slot.x1, slot.y1, slot.x2, slot.y2, custom_label=slot.label)
+
+    preload_slot_thumbnails(self)
 
 def add_labeled_rectangle(self, slot_name, x1, y1, x2, y2, custom_label=None):
     """
@@ -90,17 +153,25 @@ def add_labeled_rectangle(self, slot_name, x1, y1, x2, y2, custom_label=None):
     self.layout_rectangles[slot_name] = {
         "rectangle": rect_id,
         "label": label_id,
-        "coords": (x1, y1, x2, y2),
         "image_id": None,
         "current_image": None,
+        "pending_thumbnail": None,
         "is_sequence": "intermediate" in slot_name
     }
-    
-    self.layout_canvas.tag_bind(rect_id, "<Button-1>", 
-                                lambda e, sn=slot_name: self._on_rectangle_click(sn, e))
-    # Also bind click to the label
-    self.layout_canvas.tag_bind(label_id, "<Button-1>", 
-                                lambda e, sn=slot_name: self._on_rectangle_click(sn, e))
+    # Clicks are dispatched by one canvas binding (see ComplexLayoutDialog._on_canvas_click)
+    self._canvas_item_to_slot[rect_id] = slot_name
+    self._canvas_item_to_slot[label_id] = slot_name
+
+def clear_slot_image(self, slot_name):
+    """
+    Hides a slot's image item and points it at the dialog's blank PhotoImage, so the
+    slot no longer keeps its thumbnail alive. The item is kept for reuse.
+    This method should be called by ComplexLayoutDialog.
+    """
+    rect_data = self.layout_rectangles[slot_name]
+    if rect_data["image_id"]:
+        self.layout_canvas.itemconfig(rect_data["image_id"], image=self._empty_photo, state=tk.HIDDEN)
+    rect_data["tk_image_ref"] = None
 
 def display_image_in_rectangle(self, slot_name, img_path):
     """
@@ -111,12 +182,8 @@ def display_image_in_rectangle(self, slot_name, img_path):
     if not rect_data:
         return
     
-    # Remove existing image if any
-    if rect_data["image_id"]:
-        self.layout_canvas.delete(rect_data["image_id"])
-    
-    # Get coordinates of rectangle
-    x1, y1, x2, y2 = rect_data["coords"]
+    # Get coordinates of rectangle from the canvas, which owns them
+    x1, y1, x2, y2 = self.layout_canvas.coords(rect_data["rectangle"])
     center_x = (x1 + x2) / 2
     
     # Calculate size to fit in rectangle (with padding for label)
@@ -127,37 +194,80 @@ def display_image_in_rectangle(self, slot_name, img_path):
     display_area_height = rect_height - 20
     
     # Calculate optimal size for the thumbnail to fit within the rectangle
-    # Maintain aspect ratio
-    pil_image_original = Image.open(img_path)
-    
-    # Apply rotation to the image itself before calculating thumbnail size
+    # Maintain aspect ratio. Only the header is needed here: the image itself is never
+    # decoded or rotated at full resolution, the thumbnail cache handles that.
     rotation_degrees = self.image_rotations.get(img_path, 0)
-    if rotation_degrees != 0:
-        pil_image_original = pil_image_original.rotate(rotation_degrees, expand=True)
 
-    original_width, original_height = pil_image_original.size
-    
-    # Calculate scaling factor
-    width_ratio = rect_width / original_width
-    height_ratio = display_area_height / original_height
-    
-    fit_ratio = min(width_ratio, height_ratio)
-    
-    new_width = int(original_width * fit_ratio)
-    new_height = int(original_height * fit_ratio)
+    image_size = self.image_size_cache.get(img_path)
+    if image_size is None:
+        with Image.open(img_path) as pil_image:
+            image_size = pil_image.size
+        self.image_size_cache[img_path] = image_size
+
+    new_width, new_height = _fit_size(image_size, rotation_degrees, rect_width, display_area_height)
     
-    # Get thumbnail
-    tk_thumb = self._get_tk_thumbnail(img_path, (new_width, new_height))
+    # Show a placeholder and decode the thumbnail on a worker thread so the dialog
+    # stays responsive; only the PhotoImage is built back on the Tk thread.
+    clear_slot_image(self, slot_name)
+    self.layout_canvas.itemconfig(rect_data["rectangle"], fill="lightgray")
+
+    request = (img_path, rotation_degrees, new_width, new_height)
+    rect_data["pending_thumbnail"] = request
+    future = None
+    if request not in self.slot_photo_cache:
+        future = self.thumbnail_executor.submit(disk_cached_thumbnail, img_path, rotation_degrees, (new_width, new_height))
+    install_slot_thumbnail(self, slot_name, request, future, center_x, y1 + 10 + new_height // 2) # Position below the label area
+
+def install_slot_thumbnail(self, slot_name, request, future, center_x, image_y):
+    """
+    Puts a background-decoded thumbnail into its slot once it is ready.
+    future is None when the slot PhotoImage for request is already cached.
+    This method should be called by ComplexLayoutDialog.
+    """
+    if future is not None and not future.done():
+        self.after(THUMBNAIL_POLL_MS, lambda: install_slot_thumbnail(self, slot_name, request, future, center_x, image_y))
+        return
+
+    try:
+        if not self.winfo_exists():
+            return
+    except tk.TclError:
+        return
+
+    rect_data = self.layout_rectangles[slot_name]
+    # Skip results superseded by a newer display request or by unassigning the slot
+    if rect_data["pending_thumbnail"] != request or rect_data["current_image"] != request[0]:
+        return
+    rect_data["pending_thumbnail"] = None
+
+    img_path = request[0]
+    tk_thumb = self.slot_photo_cache.get(request)
+    if tk_thumb is not None:
+        self.slot_photo_cache.move_to_end(request)
+    else:
+        try:
+            tk_thumb = ImageTk.PhotoImage(future.result())
+        except Exception as e:
+            print(f"Error creating thumbnail for {img_path}: {e}")
+            tk_thumb = None
+        else:
+            self.slot_photo_cache[request] = tk_thumb
+            while len(self.slot_photo_cache) > SLOT_PHOTO_CACHE_SIZE:
+                self.slot_photo_cache.popitem(last=False)
     
     if tk_thumb:
-        # Create image on canvas, adjusting y for label
-        img_id = self.layout_canvas.create_image(
-            center_x, y1 + 10 + new_height // 2, # Position below the label area
-            image=tk_thumb)
+        if rect_data["image_id"]:
+            # Reuse the existing canvas item rather than deleting and recreating it
+            self.layout_canvas.itemconfig(rect_data["image_id"], image=tk_thumb, state=tk.NORMAL)
+            self.layout_canvas.coords(rect_data["image_id"], center_x, image_y)
+        else:
+            rect_data["image_id"] = self.layout_canvas.create_image(center_x, image_y, image=tk_thumb)
+            self._canvas_item_to_slot[rect_data["image_id"]] = slot_name
         
         # Store reference to prevent garbage collection
         rect_data["tk_image_ref"] = tk_thumb 
-        rect_data["image_id"] = img_id
         
         # Change rectangle color to indicate it has an image
-        self.layout_canvas.itemconfig(rect_data["rectangle"], fill="lightyellow")
\ No newline at end of file
+        self.layout_canvas.itemconfig(rect_data["rectangle"], fill="lightyellow")
+    else:
+        self.layout_canvas.itemconfig(rect_data["rectangle"], fill="white")
@@ -2,23 +2,50 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from PIL import Image, ImageTk, ImageDraw
 import os
+import collections
+import concurrent.futures
 import json # Added for pretty printing of the final layout
 
 # Import extracted functions with new names
-from lib.complex_layout_image_utils import prepare_thumbnails, get_tk_thumbnail, rotate_image, add_rotate_overlay
-from lib.complex_layout_layout_drawing import create_layout_visualization, add_labeled_rectangle, display_image_in_rectangle
-from lib.complex_layout_dialog_logic import get_default_layout_structure, load_current_layout_into_ui, on_ok, on_cancel
-from lib.complex_layout_sequence_manager import show_sequence_dialog, add_selected_to_sequence, remove_from_sequence, move_sequence_item, update_sequence_indicator
-from lib.complex_layout_undo_manager import record_action, undo_last_action
+from lib.complex_layout_image_utils import prepare_thumbnails, get_tk_thumbnail, rotate_image
+from lib.complex_layout_layout_drawing import create_layout_visualization, clear_slot_image, display_image_in_rectangle
+from lib.complex_layout_dialog_logic import get_default_layout_structure, load_current_layout_into_ui, on_ok, on_cancel, get_layout_config
+from lib.complex_layout_sequence_manager import show_sequence_dialog, update_sequence_indicator
+from lib.complex_layout_undo_manager import record_action, undo_last_action, UNDO_HISTORY_LIMIT
+
+def _entry_paths(value):
+    """Image paths held by a result_layout entry (main slot dict, sequence list, or old bare paths)."""
+    if isinstance(value, dict):
+        return [value["path"]] if value.get("path") else []
+    if isinstance(value, list):
+        return [item["path"] if isinstance(item, dict) else item for item in value
+                if (item.get("path") if isinstance(item, dict) else item)]
+    if isinstance(value, str) and value:
+        return [value]
+    return []
+
+def _normalize_entry(value):
+    """Copy of a current_layout entry with old-format sequence paths turned into dicts, or None if unrecognized."""
+    if isinstance(value, dict) and "path" in value: # Main slots
+        return value.copy()
+    if isinstance(value, list): # Sequence slots; old format held bare paths
+        return [item.copy() if isinstance(item, dict) else {"path": item, "rotation": 0} for item in value]
+    return None
+
+AVAILABLE_THUMB_TAG = "AvailThumb" # Bindtag shared by the thumbnail labels in the available list
+AVAILABLE_THUMBS_KEPT = 64 # Loaded list thumbnails kept before off-screen ones are released
 
 
 class ComplexLayoutDialog(tk.Toplevel):
+    _sequence_dialog_size = None # (width, height) of the sequence dialog, measured on first open
+
     def __init__(self, parent, image_paths, current_layout=None, thumbnail_size=(200,200)): # Doubled thumbnail size
         super().__init__(parent)
         self.transient(parent)
         self.title("Define Complex Photo Layout")
         self.parent_app = parent
         self.image_paths = image_paths
+        self._basename_cache = {path: os.path.basename(path) for path in image_paths} # Display names
         
         # Initialize result_layout with default or provided structure
         # Ensure that if current_layout has images, their rotation is tracked
@@ -26,53 +53,44 @@ class ComplexLayoutDialog(tk.Toplevel):
         self.image_rotations = {path: 0 for path in image_paths} # Store rotation for each image
 
         if current_layout:
-            # Deep copy current_layout to avoid modifying the original dict directly
-            # and to handle paths with rotations correctly.
+            # Copy and normalize current_layout once so the rest of the dialog only sees
+            # {"path", "rotation"} dicts, then take each image's rotation from that.
             for key, value in current_layout.items():
-                if isinstance(value, dict) and "path" in value: # Main slots
-                    self.result_layout[key] = value.copy()
-                    self.image_rotations[value["path"]] = value.get("rotation", 0)
-                elif isinstance(value, list): # Sequence slots
-                    self.result_layout[key] = [item.copy() if isinstance(item, dict) else {"path": item, "rotation": 0} for item in value]
-                    for item in value:
-                        if isinstance(item, dict) and "path" in item:
-                            self.image_rotations[item["path"]] = item.get("rotation", 0)
-                        else: # Handle old format where sequence items were just paths
-                             self.image_rotations[item] = 0
+                entry = _normalize_entry(value)
+                if entry is None:
+                    continue
+                self.result_layout[key] = entry
+                for item in entry if isinstance(entry, list) else [entry]:
+                    if item.get("path"):
+                        self.image_rotations[item["path"]] = item.get("rotation", 0)
+
+        # Reverse index: image path -> set of result_layout keys (main slots or sequences) using it.
+        # All writes to result_layout entries go through _set_layout_entry to keep it in step.
+        self._path_to_locations = {}
+        for key, value in self.result_layout.items():
+            for path in _entry_paths(value):
+                self._path_to_locations.setdefault(path, set()).add(key)
 
         self.thumbnail_size = thumbnail_size
-        self.pil_images_cache = {}
-        self.tk_thumbnails_cache = {}
+        self.pil_images_cache = {} # (path, rotation) -> list-size PIL thumbnail
+        self.tk_thumbnails_cache = {} # (path, size, rotation, overlay) -> PhotoImage
+        self._empty_photo = tk.PhotoImage(master=self, width=1, height=1) # Shown by slots whose image item is hidden
+        # Blank thumbnail-sized image for list entries not loaded yet
+        self._list_placeholder = tk.PhotoImage(master=self, width=thumbnail_size[0], height=thumbnail_size[1])
+        self.image_size_cache = {} # path -> (width, height) read from the image header, reused for slot redisplays
+        self.thumbnail_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        # Separate single worker for cache warming so it never delays thumbnails the user asked for
+        self.preload_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.preload_futures = []
         self.layout_rectangles = {} # Initialize layout_rectangles here
-          # Bind extracted functions as methods
-        self._prepare_thumbnails = prepare_thumbnails.__get__(self)
-        self._get_tk_thumbnail = get_tk_thumbnail.__get__(self)
-        self._rotate_image = rotate_image.__get__(self)
-        self._add_rotate_overlay = add_rotate_overlay.__get__(self)
-
-        self._create_layout_visualization = create_layout_visualization.__get__(self)
-        self._add_labeled_rectangle = add_labeled_rectangle.__get__(self)
-        self._display_image_in_rectangle = display_image_in_rectangle.__get__(self)
-
-        self._get_default_layout_structure = get_default_layout_structure.__get__(self)
-        self._load_current_layout_into_ui = load_current_layout_into_ui.__get__(self)
-        self._on_ok = on_ok.__get__(self)
-        self._on_cancel = on_cancel.__get__(self)
-
-        self._show_sequence_dialog = show_sequence_dialog.__get__(self)
-        self._add_selected_to_sequence = add_selected_to_sequence.__get__(self)
-        self._remove_from_sequence = remove_from_sequence.__get__(self)
-        self._move_sequence_item = move_sequence_item.__get__(self)
-        self._update_sequence_indicator = update_sequence_indicator.__get__(self)
-
-        self._record_action = record_action.__get__(self)
-        self._undo_last_action = undo_last_action.__get__(self)
+        # (path, rotation, width, height) -> slot PhotoImage, least recently used first.
+        # PhotoImages cannot outlive the Tk root, so the cache is cleared when the dialog closes
+        self.slot_photo_cache = collections.OrderedDict()
 
-
-        self._prepare_thumbnails()
+        prepare_thumbnails(self)
         self._setup_ui()
 
-        self.protocol("WM_DELETE_WINDOW", self._on_cancel)
+        self.protocol("WM_DELETE_WINDOW", lambda: on_cancel(self))
         self.grab_set()
         self.update_idletasks() 
         parent_x = self.parent_app.winfo_rootx()
@@ -88,58 +106,162 @@ class ComplexLayoutDialog(tk.Toplevel):
 
         self.wait_window(self)
         
+    def get_layout_config(self):
+        """The accepted layout as view -> path / list of paths, or None if cancelled."""
+        return get_layout_config(self)
+
+    def _set_layout_entry(self, key, value):
+        """Writes result_layout[key] and updates the path -> locations index to match."""
+        for path in _entry_paths(self.result_layout.get(key)):
+            self._discard_location(path, key)
+        self.result_layout[key] = value
+        for path in _entry_paths(value):
+            self._path_to_locations.setdefault(path, set()).add(key)
+
+    def _add_location(self, path, key):
+        """Records key among the locations indexed for path."""
+        self._path_to_locations.setdefault(path, set()).add(key)
+
+    def _discard_location(self, path, key):
+        """Drops key from the locations indexed for path."""
+        locations = self._path_to_locations.get(path)
+        if locations:
+            locations.discard(key)
+            if not locations:
+                del self._path_to_locations[path]
+
+    def _show_available_image(self, img_path):
+        """Shows an image's entry in the available list again."""
+        frame = self._label_frames.get(img_path)
+        if frame is not None:
+            frame.pack(pady=3, padx=3, fill=tk.X)
+
+    def _hide_available_image(self, img_path):
+        """Hides an image's entry from the available list."""
+        frame = self._label_frames.get(img_path)
+        if frame is not None:
+            frame.pack_forget()
+
     def _populate_available_images(self):
-        # Clear existing images first if repopulating
-        for widget in self.scrollable_frame_available.winfo_children():
-            widget.destroy()
+        """
+        Builds the available list's entries once; afterwards entries are only shown or
+        hidden, and _refresh_available_thumbnail updates a single entry's image.
+        """
+        self._label_to_path = {}
+        self._label_frames = {}
         
+        self.available_labels = {}
+        self._pending_list_thumbnails = {} # img_path -> label still showing the placeholder
+        self._loaded_list_thumbnails = {} # img_path -> label showing its thumbnail, oldest load first
+        
+        # Every image gets an entry so it can be shown again when unassigned, but images
+        # already assigned to a main slot or a sequence are not packed (listed).
+        # Thumbnails start as a shared blank image; _load_visible_thumbnails swaps in the
+        # real PhotoImage once an entry scrolls near the visible part of the list.
         for img_path in self.image_paths:
-            # Check if the image is already assigned to a main slot or a sequence
-            is_assigned = False
-            # Check main slots
-            for slot_data in self.layout_rectangles.values():
-                if slot_data["current_image"] == img_path:
-                    is_assigned = True
-                    break
-            if is_assigned: continue # Skip if in a main slot
-
-            # Check sequence slots
-            for seq_list in self.result_layout.values():
-                if isinstance(seq_list, list):
-                    for item in seq_list:
-                        if isinstance(item, dict) and item.get("path") == img_path:
-                            is_assigned = True
-                            break
-                if is_assigned: break
-            if is_assigned: continue # Skip if in a sequence
-
             frame = ttk.Frame(self.scrollable_frame_available, relief=tk.RAISED, borderwidth=1)
-            frame.pack(pady=3, padx=3, fill=tk.X)
+            if img_path not in self._path_to_locations:
+                frame.pack(pady=3, padx=3, fill=tk.X)
+            self._label_frames[img_path] = frame
 
-            tk_thumb = self._get_tk_thumbnail(img_path, add_rotate_icon=True)
+            img_container = ttk.Frame(frame)
+            img_container.pack(side=tk.LEFT, padx=2, pady=2)
+            
+            img_label = ttk.Label(img_container, image=self._list_placeholder, cursor="hand2")
+            img_label.pack()
+            
+            # Clicks are handled by the class bindings registered in _setup_ui
+            img_label.bindtags((AVAILABLE_THUMB_TAG,) + img_label.bindtags())
+            self._label_to_path[str(img_label)] = img_path
+            
+            img_label.image_path = img_path # Store path for easy access
+            self.available_labels[img_path] = img_label # Store the label widget
+            self._pending_list_thumbnails[img_path] = img_label
+
+        self._schedule_list_thumbnail_load()
+
+    def _queue_scrollregion(self, event=None):
+        """Schedules a scrollregion update for the available list."""
+        if not self._scrollregion_pending:
+            self._scrollregion_pending = True
+            self.after_idle(self._recalc_scrollregion)
+
+    def _recalc_scrollregion(self):
+        """Fits the available list's scrollregion to its content."""
+        self._scrollregion_pending = False
+        self._canvas_available.configure(scrollregion=self._canvas_available.bbox("all"))
+
+    def _refresh_available_thumbnail(self, img_path):
+        """Shows an image's current rotation in its available-list entry."""
+        img_label = self.available_labels.get(img_path)
+        if img_label is None or img_path in self._pending_list_thumbnails:
+            return # Not loaded yet; the lazy load will use the current rotation
+        tk_thumb = get_tk_thumbnail(self, img_path, add_rotate_icon=True)
+        if tk_thumb:
+            img_label.config(image=tk_thumb)
+            img_label.image = tk_thumb
+
+    def _on_available_scroll(self, first, last):
+        """yscrollcommand of the available list: updates the scrollbar and loads newly exposed thumbnails."""
+        self._available_scrollbar.set(first, last)
+        self._schedule_list_thumbnail_load()
+
+    def _schedule_list_thumbnail_load(self):
+        """Coalesces scroll and resize events into one _load_visible_thumbnails call per idle."""
+        if not self._list_load_scheduled:
+            self._list_load_scheduled = True
+            self.after_idle(self._load_visible_thumbnails)
+
+    def _load_visible_thumbnails(self):
+        """
+        Creates PhotoImages for listed entries within one screen of the visible area, and
+        once more than AVAILABLE_THUMBS_KEPT are loaded, releases those furthest back in
+        load order that are outside that window.
+        """
+        self._list_load_scheduled = False
+        canvas = self._canvas_available
+        if not canvas.winfo_ismapped():
+            return # The canvas <Configure> binding retries once it is laid out
+        view_height = max(canvas.winfo_height(), self.thumbnail_size[1])
+        top = canvas.canvasy(0) - view_height
+        bottom = canvas.canvasy(0) + 2 * view_height
+
+        def near_view(img_path):
+            frame = self._label_frames[img_path]
+            if not frame.winfo_manager(): # Not listed (assigned to a slot)
+                return False
+            if frame.winfo_height() <= 1:
+                return False # Not laid out yet; the scrollregion update will schedule another pass
+            frame_top = frame.winfo_y()
+            return top <= frame_top + frame.winfo_height() and frame_top <= bottom
+        
+        for img_path, img_label in list(self._pending_list_thumbnails.items()):
+            if not near_view(img_path):
+                continue
+            
+            del self._pending_list_thumbnails[img_path]
+            tk_thumb = get_tk_thumbnail(self, img_path, add_rotate_icon=True)
             if tk_thumb:
-                img_container = ttk.Frame(frame)
-                img_container.pack(side=tk.LEFT, padx=2, pady=2)
-                
-                img_label = ttk.Label(img_container, image=tk_thumb, cursor="hand2")
-                img_label.pack()
-                
-                # Bind regular click for selection
-                img_label.bind("<Button-1>", lambda e, p=img_path: self._on_thumbnail_click(p))
-                
-                # Bind right-click for rotation on the image itself
-                img_label.bind("<Button-3>", lambda e, p=img_path: self._rotate_image(p))
-                
-                # Bind additional click handler for the top-right corner of the image
-                img_label.bind("<Button-1>", lambda e, p=img_path: self._handle_image_click(e, p), add="+")
-                
-                img_label.image_path = img_path # Store path for easy access
-                self.available_labels[img_path] = img_label # Store the label widget
+                img_label.config(image=tk_thumb)
+                img_label.image = tk_thumb # Keep the PhotoImage alive if the thumbnail cache evicts it
+                self._loaded_list_thumbnails[img_path] = img_label
             else:
-                error_label = ttk.Label(frame, text=f"Error loading {os.path.basename(img_path)}", 
-                                        foreground="red", background="lightgrey")
-                error_label.pack(side=tk.LEFT, padx=2, pady=2)
-                self.available_labels[img_path] = error_label # Store the label widget for errors too
+                img_label.config(image="", text=f"Error loading {self._basename_cache[img_path]}", 
+                                 foreground="red", background="lightgrey")
+
+        excess = len(self._loaded_list_thumbnails) - AVAILABLE_THUMBS_KEPT
+        for img_path in list(self._loaded_list_thumbnails):
+            if excess <= 0:
+                break
+            if near_view(img_path):
+                continue
+            img_label = self._loaded_list_thumbnails.pop(img_path)
+            img_label.config(image=self._list_placeholder)
+            img_label.image = None
+            self.tk_thumbnails_cache.pop(
+                (img_path, self.thumbnail_size, self.image_rotations.get(img_path, 0) % 360, True), None)
+            self._pending_list_thumbnails[img_path] = img_label
+            excess -= 1
 
     def _setup_ui(self):
         container = ttk.Frame(self, padding="10")
@@ -153,14 +275,26 @@ class ComplexLayoutDialog(tk.Toplevel):
         scrollbar_available = ttk.Scrollbar(available_panel, orient="vertical", command=canvas_available.yview)
         self.scrollable_frame_available = ttk.Frame(canvas_available)
 
-        self.scrollable_frame_available.bind(
-            "<Configure>", 
-            lambda e: canvas_available.configure(scrollregion=canvas_available.bbox("all"))
-        )
+        # The frame resizes once per packed entry while populating; recompute the
+        # scrollregion at most once per idle instead of on every event
+        self._scrollregion_pending = False
+        self.scrollable_frame_available.bind("<Configure>", self._queue_scrollregion)
         canvas_available.create_window((0, 0), window=self.scrollable_frame_available, anchor="nw")
-        canvas_available.configure(yscrollcommand=scrollbar_available.set)
+        self._canvas_available = canvas_available
+        self._available_scrollbar = scrollbar_available
+        canvas_available.configure(yscrollcommand=self._on_available_scroll)
+        # Resizing the dialog can expose entries without scrolling
+        canvas_available.bind("<Configure>", lambda e: self._schedule_list_thumbnail_load())
 
         self.available_labels = {} 
+        self._label_frames = {} # img_path -> outer frame of its entry in the available list
+        self._label_to_path = {}
+        self._pending_list_thumbnails = {}
+        self._loaded_list_thumbnails = {}
+        self._list_load_scheduled = False
+        # One class binding per event serves every thumbnail label, instead of per-label closures
+        self.bind_class(AVAILABLE_THUMB_TAG, "<Button-1>", self._dispatch_thumbnail_click)
+        self.bind_class(AVAILABLE_THUMB_TAG, "<Button-3>", self._dispatch_thumbnail_rotate)
         self._populate_available_images() # Call the bound method
 
         canvas_available.pack(side="left", fill="y", expand=False)
@@ -172,7 +306,7 @@ class ComplexLayoutDialog(tk.Toplevel):
         undo_button_frame = ttk.Frame(layout_panel)
         undo_button_frame.pack(fill=tk.X, anchor=tk.NE)
         # Use tk.Button instead of ttk.Button to support font parameter
-        undo_button = tk.Button(undo_button_frame, text="↶", command=self._undo_last_action, 
+        undo_button = tk.Button(undo_button_frame, text="↶", command=lambda: undo_last_action(self), 
                               width=2, font=("Arial", 14), relief=tk.RAISED)
         undo_button.pack(side=tk.RIGHT, pady=5)
         
@@ -180,9 +314,9 @@ class ComplexLayoutDialog(tk.Toplevel):
         undo_tooltip = ttk.Label(undo_button_frame, text="Undo Last Action", background="lightyellow")
         
         def show_tooltip(event):
-            x, y, _, _ = undo_button.bbox("all")
-            x += undo_button.winfo_rootx() - 80  # Adjust x position
-            y += undo_button.winfo_rooty() + 20  # Adjust y position
+            # place() is relative to undo_button_frame, so use the button's position within it
+            x = undo_button.winfo_x() - 80  # Adjust x position
+            y = undo_button.winfo_y() + undo_button.winfo_height()  # Just below the button
             undo_tooltip.place(x=x, y=y)
             
         def hide_tooltip(event):
@@ -191,14 +325,16 @@ class ComplexLayoutDialog(tk.Toplevel):
         undo_button.bind("<Enter>", show_tooltip)
         undo_button.bind("<Leave>", hide_tooltip)
         
-        self.action_history = [] # To store actions for undo
+        self.action_history = collections.deque(maxlen=UNDO_HISTORY_LIMIT) # To store actions for undo
 
         # Create a canvas for the layout
         self.layout_canvas = tk.Canvas(layout_panel, bg="white", bd=1, relief=tk.SUNKEN)
-        self.layout_canvas.pack(expand=True, fill=tk.BOTH)
         
-        # Setup the layout rectangles as per the image
-        self._create_layout_visualization()
+        # Setup the layout rectangles as per the image. This runs before the canvas is
+        # packed so its final size and all items are in place for a single layout/paint pass.
+        create_layout_visualization(self)
+        self.layout_canvas.bind("<Button-1>", self._on_canvas_click)
+        self.layout_canvas.pack(expand=True, fill=tk.BOTH)
         
         # Button panel
         button_panel = ttk.Frame(self, padding="5") 
@@ -207,15 +343,29 @@ class ComplexLayoutDialog(tk.Toplevel):
         self.status_bar = ttk.Label(button_panel, text="Click an image, then click a rectangle to assign it.")
         self.status_bar.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
 
-        ok_button = ttk.Button(button_panel, text="OK", command=self._on_ok, width=10)
+        ok_button = ttk.Button(button_panel, text="OK", command=lambda: on_ok(self), width=10)
         ok_button.pack(side=tk.RIGHT, padx=(0,5)) 
-        cancel_button = ttk.Button(button_panel, text="Cancel", command=self._on_cancel, width=10)
+        cancel_button = ttk.Button(button_panel, text="Cancel", command=lambda: on_cancel(self), width=10)
         cancel_button.pack(side=tk.RIGHT, padx=5)
 
         self.selected_image_path = None # Only store selected image for click-based assignment
         
         # Load current layout
-        self._load_current_layout_into_ui()
+        load_current_layout_into_ui(self)
+
+    def _dispatch_thumbnail_click(self, event):
+        """Left click on an available thumbnail: select it, then check the rotate overlay."""
+        img_path = self._label_to_path.get(str(event.widget))
+        if img_path is None:
+            return
+        self._on_thumbnail_click(img_path)
+        return self._handle_image_click(event, img_path)
+
+    def _dispatch_thumbnail_rotate(self, event):
+        """Right click on an available thumbnail rotates it."""
+        img_path = self._label_to_path.get(str(event.widget))
+        if img_path is not None:
+            rotate_image(self, img_path)
 
     def _on_thumbnail_click(self, img_path):
         if self.selected_image_path:
@@ -231,6 +381,17 @@ class ComplexLayoutDialog(tk.Toplevel):
             self.status_bar.config(text="Click an image, then click a rectangle to assign it.")
 
 
+    def _on_canvas_click(self, event):
+        """Single click handler for the layout canvas; finds the slot under the pointer."""
+        x = self.layout_canvas.canvasx(event.x)
+        y = self.layout_canvas.canvasy(event.y)
+        # Topmost first, so an image or label resolves before the rectangle beneath it
+        for item in reversed(self.layout_canvas.find_overlapping(x, y, x, y)):
+            slot_name = self._canvas_item_to_slot.get(item)
+            if slot_name:
+                self._on_rectangle_click(slot_name, event)
+                return
+
     def _on_rectangle_click(self, slot_name, event):
         """Handle clicks on rectangles."""
         rect_data = self.layout_rectangles.get(slot_name)
@@ -238,7 +399,7 @@ class ComplexLayoutDialog(tk.Toplevel):
         
         if rect_data["is_sequence"]:
             # For sequences, show images in a separate dialog
-            self._show_sequence_dialog(slot_name)
+            show_sequence_dialog(self, slot_name)
         elif self.selected_image_path:
             # If an image is selected, assign it to this slot
             self._assign_image_to_slot(slot_name, self.selected_image_path)
@@ -256,64 +417,54 @@ class ComplexLayoutDialog(tk.Toplevel):
     def _assign_image_to_slot(self, slot_name, img_path):
         """Assign an image to a main slot."""
         # Check if image is already used in another main slot
-        for s_name, rect_data in self.layout_rectangles.items():
-            if not rect_data["is_sequence"] and rect_data["current_image"] == img_path and s_name != slot_name:
+        for s_name in self._path_to_locations.get(img_path, set()) - {slot_name}:
+            if not isinstance(self.result_layout.get(s_name), list):
                 messagebox.showwarning("Image In Use", 
                                        f"Image is already assigned to '{s_name.capitalize()}'. Unassign it first.", 
                                        parent=self)
                 return
         
-        # Record previous state for undo
-        previous_assignment_path = self.result_layout.get(slot_name)
-        previous_assignment_data = None
-        if isinstance(previous_assignment_path, dict) and "path" in previous_assignment_path:
-            previous_assignment_data = previous_assignment_path
-        elif isinstance(previous_assignment_path, str): # Old format, convert to dict
-            previous_assignment_data = {"path": previous_assignment_path, "rotation": self.image_rotations.get(previous_assignment_path, 0)}
-
-        new_assignment_data = {"path": img_path, "rotation": self.image_rotations.get(img_path, 0)}
-
-        if previous_assignment_data != new_assignment_data: # Only record if change happens
-            self._record_action("assign", slot_name, previous_assignment_data, new_assignment_data)
-
-        # Remove from any sequence
-        for key in self.result_layout.keys():
-            if isinstance(self.result_layout[key], list):
-                # We need to iterate and remove based on the 'path' key in dictionary items
-                initial_len = len(self.result_layout[key])
-                self.result_layout[key] = [
-                    item for item in self.result_layout[key] 
-                    if not (isinstance(item, dict) and item.get("path") == img_path)
-                ]
-                if len(self.result_layout[key]) < initial_len:
-                    self._update_sequence_indicator(key)
+        # Record previous state for undo as flat (path, rotation) values rather than dicts
+        previous_assignment = self.result_layout.get(slot_name)
+        previous_path, previous_rotation = None, 0
+        if isinstance(previous_assignment, dict) and "path" in previous_assignment:
+            previous_path, previous_rotation = previous_assignment["path"], previous_assignment.get("rotation", 0)
+        elif isinstance(previous_assignment, str): # Old format
+            previous_path, previous_rotation = previous_assignment, self.image_rotations.get(previous_assignment, 0)
+
+        new_rotation = self.image_rotations.get(img_path, 0)
+
+        if (previous_path, previous_rotation) != (img_path, new_rotation): # Only record if change happens
+            record_action(self, "assign", slot_name, previous_path, previous_rotation, img_path, new_rotation)
+
+        # Remove from any sequence that holds it
+        for key in list(self._path_to_locations.get(img_path, ())):
+            sequence = self.result_layout.get(key)
+            if isinstance(sequence, list):
+                # Sequences hold each path at most once, so delete the one match in place
+                for i, item in enumerate(sequence):
+                    if isinstance(item, dict) and item.get("path") == img_path:
+                        del sequence[i]
+                        break
+                self._discard_location(img_path, key)
+                update_sequence_indicator(self, key)
         
         # Check if current slot already has an image
         rect_data = self.layout_rectangles[slot_name]
         current_img_path = rect_data["current_image"]
         if current_img_path:
             # Make the current image available again
-            if current_img_path in self.available_labels:
-                self.available_labels[current_img_path].master.pack(pady=3, padx=3, fill=tk.X)
+            self._show_available_image(current_img_path)
             
-            # Remove the current image from canvas
-            if rect_data["image_id"]:
-                self.layout_canvas.delete(rect_data["image_id"])
-                rect_data["image_id"] = None
+            # The canvas image item is reused by _display_image_in_rectangle below
         
         # Assign new image
         self.layout_rectangles[slot_name]["current_image"] = img_path
-        self.result_layout[slot_name] = {"path": img_path, "rotation": self.image_rotations.get(img_path, 0)}        # Display the image in the rectangle
-        self._display_image_in_rectangle(slot_name, img_path)
+        self._set_layout_entry(slot_name, {"path": img_path, "rotation": new_rotation})
+        # Display the image in the rectangle
+        display_image_in_rectangle(self, slot_name, img_path)
           # Hide the image from available list when assigned to any view
-        if img_path in self.available_labels:
-            # Get the frame that contains the image (this is what we want to hide)
-            label = self.available_labels[img_path]
-            inner_frame = label.master  # This is the immediate container
-            outer_frame = inner_frame.master  # This is the outer frame we need to hide
-            
-            # Hide completely using pack_forget
-            outer_frame.pack_forget()
+        self._hide_available_image(img_path)
         self.status_bar.config(text=f"Assigned {os.path.basename(img_path)} to {slot_name.capitalize()}.")
 
     def _unassign_image_from_slot(self, slot_name):
@@ -323,46 +474,19 @@ class ComplexLayoutDialog(tk.Toplevel):
         if not img_path:
             return
         
-        # Get current rotation to record for undo
-        current_rotation = self.image_rotations.get(img_path, 0)
-        img_data_for_undo = {"path": img_path, "rotation": current_rotation}
-        
-        # Record action for undo
-        self._record_action("unassign", slot_name, img_data_for_undo)
+        # Record action for undo, with the current rotation
+        record_action(self, "unassign", slot_name, img_path, self.image_rotations.get(img_path, 0))
 
         # Remove image from result layout
-        self.result_layout[slot_name] = None
+        self._set_layout_entry(slot_name, None)
         rect_data["current_image"] = None
         
-        # Remove image from canvas
-        if rect_data["image_id"]:
-            self.layout_canvas.delete(rect_data["image_id"])
-            rect_data["image_id"] = None        # Make image available again
-        if img_path in self.available_labels:
-            # Get the frame that contains the image
-            label = self.available_labels[img_path]
-            inner_frame = label.master  # This is the immediate container
-            outer_frame = inner_frame.master  # This is the frame we need to show
-            
-            # Check if this image is used in any other slot before making it available again
-            is_used_elsewhere = False
-            for other_slot_name, other_rect_data in self.layout_rectangles.items():
-                if other_slot_name != slot_name and other_rect_data["current_image"] == img_path:
-                    is_used_elsewhere = True
-                    break
-            
-            # Also check sequence slots
-            for seq_key, seq_list in self.result_layout.items():
-                if isinstance(seq_list, list):
-                    for item in seq_list:
-                        if isinstance(item, dict) and item.get("path") == img_path:
-                            is_used_elsewhere = True
-                            break
-            
-            # Only show the frame if the image isn't used elsewhere
-            if not is_used_elsewhere:
-                # Show the frame again with proper padding
-                outer_frame.pack(pady=3, padx=3, fill=tk.X)
+        # Hide image on canvas; the item is reused on the next assignment
+        clear_slot_image(self, slot_name)
+        # Make image available again
+        # Only show the frame if the image isn't used in any other slot
+        if img_path not in self._path_to_locations:
+            self._show_available_image(img_path)
         # Reset rectangle color
         self.layout_canvas.itemconfig(rect_data["rectangle"], fill="white")
 
@@ -373,8 +497,9 @@ class ComplexLayoutDialog(tk.Toplevel):
         Handle clicks on the image, checking if the click is in the rotation overlay area
         """
         # Get image dimensions
-        if img_path in self.pil_images_cache:
-            img = self.pil_images_cache[img_path]
+        rotation_key = (img_path, self.image_rotations.get(img_path, 0) % 360)
+        if rotation_key in self.pil_images_cache:
+            img = self.pil_images_cache[rotation_key]
             
             # Calculate the position of the rotation overlay (top-right corner)
             # Use a consistent calculation with add_rotate_overlay
@@ -391,7 +516,7 @@ class ComplexLayoutDialog(tk.Toplevel):
             # If the distance is less than the radius, the click is inside the circle
             if distance_squared <= circle_radius * circle_radius:
                 # Call the rotation function
-                self._rotate_image(img_path)
+                rotate_image(self, img_path)
                 # Prevent further processing of the click
                 return "break"
 
@@ -415,7 +540,7 @@ if __name__ == '__main__':
         dummy_image_paths.append(img_path)
 
     # Example of a pre-existing layout (e.g., loaded from a config file)
-    # The structure should match what _get_default_layout_structure produces,
+    # The structure should match what get_default_layout_structure produces,
     # but now each path includes rotation data.
     initial_layout = {
         "obverse": {"path": dummy_image_paths[0], "rotation": 0},
@@ -2,6 +2,13 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 
+from lib.complex_layout_undo_manager import record_action
+
+def _basenames(self, sequence_items):
+    """Listbox labels for sequence items, from the dialog's precomputed basenames."""
+    cache = self._basename_cache
+    return [cache.get(item["path"]) or os.path.basename(item["path"]) for item in sequence_items]
+
 def show_sequence_dialog(self, slot_key):
     """
     Manages the pop-up dialog for sequence images.
@@ -19,7 +26,10 @@ def show_sequence_dialog(self, slot_key):
     listbox_frame = ttk.Frame(dialog)
     listbox_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
     
-    listbox = tk.Listbox(listbox_frame, height=6, selectmode=tk.SINGLE)
+    # Contents are replaced by setting the list variable, one Tcl call per refresh
+    listvar = tk.StringVar(dialog)
+    listbox = tk.Listbox(listbox_frame, height=6, selectmode=tk.SINGLE, listvariable=listvar)
+    listbox.listvar = listvar
     listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
     
     scrollbar = ttk.Scrollbar(listbox_frame, orient=tk.VERTICAL, command=listbox.yview)
@@ -27,8 +37,7 @@ def show_sequence_dialog(self, slot_key):
     listbox.config(yscrollcommand=scrollbar.set)
     
     # Populate listbox (display only the basename)
-    for item in sequence_images_data:
-        listbox.insert(tk.END, os.path.basename(item["path"]))
+    listvar.set(tuple(_basenames(self, sequence_images_data)))
     
     buttons_frame = ttk.Frame(dialog)
     buttons_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -50,10 +59,17 @@ def show_sequence_dialog(self, slot_key):
     close_button = ttk.Button(buttons_frame, text="Close", command=dialog.destroy)
     close_button.pack(side=tk.RIGHT, padx=5)
     
-    # Center dialog
-    dialog.update_idletasks()
-    width = dialog.winfo_width()
-    height = dialog.winfo_height()
+    # Center dialog. Its contents never change size, so the geometry pass that
+    # measures it is only needed the first time a sequence dialog opens.
+    dialog_class = type(self)
+    if dialog_class._sequence_dialog_size is not None:
+        width, height = dialog_class._sequence_dialog_size
+    else:
+        dialog.update_idletasks()
+        # Requested size, since the window may not be mapped yet and would report 1x1
+        width, height = dialog.winfo_reqwidth(), dialog.winfo_reqheight()
+        if width > 1 and height > 1:
+            dialog_class._sequence_dialog_size = (width, height)
     x = self.winfo_rootx() + (self.winfo_width() // 2) - (width // 2)
     y = self.winfo_rooty() + (self.winfo_height() // 2) - (height // 2)
     dialog.geometry(f"{width}x{height}+{x}+{y}")
@@ -69,9 +85,10 @@ def add_selected_to_sequence(self, slot_key, dialog, listbox_widget):
         messagebox.showinfo("No Image Selected", "Please select an image from the available images first.", parent=dialog)
         return
     
-    # Check if image is used in a main slot
-    for slot_name, rect_data in self.layout_rectangles.items():
-        if not rect_data["is_sequence"] and rect_data["current_image"] == self.selected_image_path:
+    # Check if image is used in a main slot, via the dialog's path -> layout keys index
+    locations = self._path_to_locations.get(self.selected_image_path, set())
+    for slot_name in locations:
+        if not isinstance(self.result_layout.get(slot_name), list):
             messagebox.showwarning("Image In Use", 
                                    f"Image is already assigned to main view '{slot_name}'. Cannot add to sequence.", 
                                    parent=dialog)
@@ -80,37 +97,31 @@ def add_selected_to_sequence(self, slot_key, dialog, listbox_widget):
     # Add to sequence
     current_sequence = self.result_layout.get(slot_key, [])
     
-    # Ensure current_sequence contains dictionaries with "path" and "rotation"
-    # Convert if it's still just paths from an older layout
-    processed_sequence = []
-    for item in current_sequence:
-        if isinstance(item, dict) and "path" in item:
-            processed_sequence.append(item)
-        else: # Assume it's just a path
-            processed_sequence.append({"path": item, "rotation": self.image_rotations.get(item, 0)})
+    # Items were normalized to dicts when the layout was loaded; work on a copy
+    # so _set_layout_entry can still see the old contents when reindexing
+    processed_sequence = list(current_sequence)
 
     # Check if image is already in the sequence (by path)
-    if any(item["path"] == self.selected_image_path for item in processed_sequence):
+    if slot_key in locations:
         messagebox.showinfo("Already In Sequence", "This image is already in the sequence.", parent=dialog)
         return
     
     new_item = {"path": self.selected_image_path, "rotation": self.image_rotations.get(self.selected_image_path, 0)}
 
     # Record action for undo: (action_type, slot_key, image_path, rotation, index_added_at)
-    self._record_action("add_sequence", slot_key, new_item, len(processed_sequence))
+    record_action(self, "add_sequence", slot_key, new_item, len(processed_sequence))
 
     processed_sequence.append(new_item)
-    self.result_layout[slot_key] = processed_sequence
+    self._set_layout_entry(slot_key, processed_sequence)
     
     # Hide the image from available list
-    if self.selected_image_path in self.available_labels:
-        self.available_labels[self.selected_image_path].master.pack_forget() # Hide the frame containing label and button
+    self._hide_available_image(self.selected_image_path) # Hide the frame containing label and button
     
     # Update sequence count indicator
     update_sequence_indicator(self, slot_key)
     
     # Update the listbox in the current dialog
-    listbox_widget.insert(tk.END, os.path.basename(self.selected_image_path))
+    listbox_widget.insert(tk.END, *_basenames(self, [new_item]))
     listbox_widget.yview_moveto(1.0) # Scroll to bottom
 
     self._on_thumbnail_click(None) # Deselect the image
@@ -132,33 +143,24 @@ def remove_from_sequence(self, slot_key, listbox, dialog):
     if idx >= len(current_sequence):
         return
     
-    # Ensure current_sequence contains dictionaries
-    processed_sequence = []
-    for item in current_sequence:
-        if isinstance(item, dict) and "path" in item:
-            processed_sequence.append(item)
-        else: # Assume it's just a path
-            processed_sequence.append({"path": item, "rotation": self.image_rotations.get(item, 0)})
+    processed_sequence = list(current_sequence)
 
     removed_item = processed_sequence.pop(idx)
     removed_img_path = removed_item["path"]
     
-    self.result_layout[slot_key] = processed_sequence
+    self._set_layout_entry(slot_key, processed_sequence)
     
     # Record action for undo: (action_type, slot_key, image_dict, index_removed_from)
-    self._record_action("remove_sequence", slot_key, removed_item, idx)
+    record_action(self, "remove_sequence", slot_key, removed_item, idx)
 
     # Make the image available again
-    if removed_img_path in self.available_labels:
-        self.available_labels[removed_img_path].master.pack(pady=3, padx=3, fill=tk.X)
+    self._show_available_image(removed_img_path)
     
     # Update sequence count indicator
     update_sequence_indicator(self, slot_key)
     
     # Refresh the listbox
-    listbox.delete(0, tk.END)
-    for item in processed_sequence:
-        listbox.insert(tk.END, os.path.basename(item["path"]))
+    listbox.listvar.set(tuple(_basenames(self, processed_sequence)))
     
     self.status_bar.config(text=f"Removed image from {slot_key} sequence.")
 
@@ -176,27 +178,19 @@ def move_sequence_item(self, slot_key, listbox, direction):
     if not current_sequence:
         return
     
-    # Ensure current_sequence contains dictionaries
-    processed_sequence = []
-    for item in current_sequence:
-        if isinstance(item, dict) and "path" in item:
-            processed_sequence.append(item)
-        else: # Assume it's just a path
-            processed_sequence.append({"path": item, "rotation": self.image_rotations.get(item, 0)})
+    processed_sequence = list(current_sequence)
 
     new_idx = idx + direction
     if 0 <= new_idx < len(processed_sequence):
         img_item_to_move = processed_sequence.pop(idx)
         processed_sequence.insert(new_idx, img_item_to_move)
-        self.result_layout[slot_key] = processed_sequence
+        self._set_layout_entry(slot_key, processed_sequence)
         
         # Record action for undo: (action_type, slot_key, image_dict, old_index, new_index)
-        self._record_action("move_sequence", slot_key, img_item_to_move, idx, new_idx)
+        record_action(self, "move_sequence", slot_key, img_item_to_move, idx, new_idx)
 
         # Refresh listbox
-        listbox.delete(0, tk.END)
-        for item in processed_sequence:
-            listbox.insert(tk.END, os.path.basename(item["path"]))
+        listbox.listvar.set(tuple(_basenames(self, processed_sequence)))
         listbox.selection_set(new_idx)
         listbox.see(new_idx) # Ensure the moved item is visible
         self.status_bar.config(text=f"Moved image in {slot_key} sequence.")
@@ -210,6 +204,10 @@ def update_sequence_indicator(self, slot_key):
     if not rect_data: return
     
     sequence_count = len(self.result_layout.get(slot_key, []))
+    # Text and color depend only on the count; skip the canvas writes if it is unchanged
+    if rect_data.get("indicator_count") == sequence_count:
+        return
+    rect_data["indicator_count"] = sequence_count
     
     # Update the label to show count
     label_text = f"{slot_key.replace('intermediate_', '').replace('_', ' ').capitalize()} ({sequence_count})"
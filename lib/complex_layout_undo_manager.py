@@ -1,12 +1,18 @@
 import tkinter as tk
 import os
+import functools
+
+from lib.complex_layout_layout_drawing import clear_slot_image, display_image_in_rectangle
+
+UNDO_HISTORY_LIMIT = 256 # Oldest actions are dropped beyond this many
 
 def record_action(self, action_type, *args):
     """
-    Records an action for undo functionality.
+    Records an action for undo functionality. The history holds the inverse operation
+    itself, bound to its arguments, so undoing is a single call.
     This method should be called by ComplexLayoutDialog.
     """
-    self.action_history.append((action_type, args))
+    self.action_history.append(functools.partial(_UNDO_HANDLERS[action_type], self, *args))
 
 def undo_last_action(self):
     """
@@ -17,125 +23,103 @@ def undo_last_action(self):
         self.status_bar.config(text="No actions to undo.")
         return
 
-    last_action = self.action_history.pop()
-    action_type = last_action[0]
-    args = last_action[1]
-
-    if action_type == "assign":
-        slot_name, old_img_data, new_img_data = args
-        
-        # New image was assigned, so clear it from the slot
-        if self.layout_rectangles[slot_name]["image_id"]:
-            self.layout_canvas.delete(self.layout_rectangles[slot_name]["image_id"])
-            self.layout_rectangles[slot_name]["image_id"] = None
-        self.layout_rectangles[slot_name]["current_image"] = None
-        self.result_layout[slot_name] = None
-        
-        if new_img_data and new_img_data["path"] in self.available_labels:
-            self.available_labels[new_img_data["path"]].master.pack(pady=3, padx=3, fill=tk.X)
-
-        # Revert to old_img_data (re-assign or make empty)
-        if old_img_data:
-            old_img_path = old_img_data["path"]
-            old_rotation = old_img_data["rotation"]
-            self.image_rotations[old_img_path] = old_rotation
-            self._display_image_in_rectangle(slot_name, old_img_path)
-            self.layout_rectangles[slot_name]["current_image"] = old_img_path
-            self.result_layout[slot_name] = old_img_data # Store dict with path and rotation
-            if old_img_path in self.available_labels:
-                self.available_labels[old_img_path].master.pack_forget()
-        else:
-            self.layout_canvas.itemconfig(self.layout_rectangles[slot_name]["rectangle"], fill="white")
-        self.status_bar.config(text=f"Undo: Assignment for {slot_name} reverted.")
-            
-    elif action_type == "unassign":
-        slot_name, img_data = args
-        img_path = img_data["path"]
-        rotation = img_data["rotation"]
-        
-        # Re-assign the image to the slot
-        self.image_rotations[img_path] = rotation # Restore rotation
-        self.result_layout[slot_name] = img_data # Store dict with path and rotation
-        self.layout_rectangles[slot_name]["current_image"] = img_path
-        self._display_image_in_rectangle(slot_name, img_path)
-        if img_path in self.available_labels:
-            self.available_labels[img_path].master.pack_forget()
-        self.status_bar.config(text=f"Undo: Image re-assigned to {slot_name}.")
-            
-    elif action_type == "add_sequence":
-        slot_key, img_data, original_idx = args
-        img_path = img_data["path"]
-        current_sequence = self.result_layout.get(slot_key, [])
-        
-        # Ensure current_sequence contains dictionaries
-        processed_sequence = []
-        for item in current_sequence:
-            if isinstance(item, dict) and "path" in item:
-                processed_sequence.append(item)
-            else: # Assume it's just a path
-                processed_sequence.append({"path": item, "rotation": self.image_rotations.get(item, 0)})
-
-        if img_data in processed_sequence: # Check by full item (path+rotation)
-            processed_sequence.remove(img_data)
-            self.result_layout[slot_key] = processed_sequence
-            self._update_sequence_indicator(slot_key)
-            if img_path in self.available_labels:
-                self.available_labels[img_path].master.pack(pady=3, padx=3, fill=tk.X)
-            self.status_bar.config(text=f"Undo: Removed image from {slot_key} sequence.")
-                
-    elif action_type == "remove_sequence":
-        slot_key, img_data, original_idx = args
-        img_path = img_data["path"]
-        rotation = img_data["rotation"]
-        current_sequence = self.result_layout.get(slot_key, [])
-        
-        # Ensure current_sequence contains dictionaries
-        processed_sequence = []
-        for item in current_sequence:
-            if isinstance(item, dict) and "path" in item:
-                processed_sequence.append(item)
-            else: # Assume it's just a path
-                processed_sequence.append({"path": item, "rotation": self.image_rotations.get(item, 0)})
-
-        processed_sequence.insert(original_idx, img_data)
-        self.result_layout[slot_key] = processed_sequence
-        self.image_rotations[img_path] = rotation # Restore rotation for this image
-        self._update_sequence_indicator(slot_key)
-        if img_path in self.available_labels:
-            self.available_labels[img_path].master.pack_forget() # Re-hide if it was made available
-        self.status_bar.config(text=f"Undo: Added image back to {slot_key} sequence.")
-
-    elif action_type == "move_sequence":
-        slot_key, img_data, old_idx, new_idx = args
-        img_path = img_data["path"]
-        current_sequence = self.result_layout.get(slot_key, [])
-        
-        # Ensure current_sequence contains dictionaries
-        processed_sequence = []
-        for item in current_sequence:
-            if isinstance(item, dict) and "path" in item:
-                processed_sequence.append(item)
-            else: # Assume it's just a path
-                processed_sequence.append({"path": item, "rotation": self.image_rotations.get(item, 0)})
-
-        if img_data in processed_sequence: # Ensure image is still there
-            processed_sequence.remove(img_data)
-            processed_sequence.insert(old_idx, img_data)
-            self.result_layout[slot_key] = processed_sequence
-            self.status_bar.config(text=f"Undo: Moved image back in {slot_key} sequence.")
-
-    elif action_type == "rotate":
-        img_path, old_rotation, new_rotation = args
-        self.image_rotations[img_path] = old_rotation
-        # Force regeneration of thumbnails
-        keys_to_delete = [k for k in self.tk_thumbnails_cache if k[0] == img_path]
-        for k in keys_to_delete:
-            del self.tk_thumbnails_cache[k]
-        
-        self._populate_available_images()
-        # If the image is currently assigned to a slot, update it there too
-        for slot_name, rect_data in self.layout_rectangles.items():
-            if rect_data["current_image"] == img_path:
-                self._display_image_in_rectangle(slot_name, img_path)
-                break
-        self.status_bar.config(text=f"Undo: Rotated {os.path.basename(img_path)} back.")
\ No newline at end of file
+    undo = self.action_history.pop()
+    undo()
+
+def _undo_assign(self, slot_name, old_img_path, old_rotation, new_img_path, new_rotation):
+    """Reverts an assignment; recorded as flat values, dicts are only rebuilt for result_layout."""
+    # New image was assigned, so clear it from the slot
+    clear_slot_image(self, slot_name)
+    self.layout_rectangles[slot_name]["current_image"] = None
+    self._set_layout_entry(slot_name, None)
+
+    if new_img_path:
+        self._show_available_image(new_img_path)
+
+    # Revert to the old image (re-assign or make empty)
+    if old_img_path:
+        self.image_rotations[old_img_path] = old_rotation
+        self.layout_rectangles[slot_name]["current_image"] = old_img_path
+        self._set_layout_entry(slot_name, {"path": old_img_path, "rotation": old_rotation})
+        # After current_image is set, so a cached thumbnail installed synchronously is not dropped
+        display_image_in_rectangle(self, slot_name, old_img_path)
+        self._hide_available_image(old_img_path)
+    else:
+        self.layout_canvas.itemconfig(self.layout_rectangles[slot_name]["rectangle"], fill="white")
+    self.status_bar.config(text=f"Undo: Assignment for {slot_name} reverted.")
+
+def _undo_unassign(self, slot_name, img_path, rotation):
+    """Re-assigns an image removed from a main slot."""
+    self.image_rotations[img_path] = rotation # Restore rotation
+    self._set_layout_entry(slot_name, {"path": img_path, "rotation": rotation})
+    self.layout_rectangles[slot_name]["current_image"] = img_path
+    display_image_in_rectangle(self, slot_name, img_path)
+    self._hide_available_image(img_path)
+    self.status_bar.config(text=f"Undo: Image re-assigned to {slot_name}.")
+
+def _undo_add_sequence(self, slot_key, img_data, original_idx):
+    """Takes an added image back out of its sequence."""
+    # Imported here: the sequence manager imports record_action from this module
+    from lib.complex_layout_sequence_manager import update_sequence_indicator
+
+    # Sequence items are always dicts, so the sequence is edited in place and only the
+    # path index needs updating alongside it
+    sequence = self.result_layout[slot_key]
+
+    # The item was added at original_idx; only search for it if later edits moved it
+    idx = original_idx if 0 <= original_idx < len(sequence) and sequence[original_idx] == img_data else None
+    if idx is None and img_data in sequence: # Check by full item (path+rotation)
+        idx = sequence.index(img_data)
+    if idx is not None:
+        del sequence[idx]
+        self._discard_location(img_data["path"], slot_key)
+        update_sequence_indicator(self, slot_key)
+        self._show_available_image(img_data["path"])
+        self.status_bar.config(text=f"Undo: Removed image from {slot_key} sequence.")
+
+def _undo_remove_sequence(self, slot_key, img_data, original_idx):
+    """Puts a removed image back at its old position in the sequence."""
+    from lib.complex_layout_sequence_manager import update_sequence_indicator
+
+    img_path = img_data["path"]
+    self.result_layout[slot_key].insert(original_idx, img_data)
+    self._add_location(img_path, slot_key)
+    self.image_rotations[img_path] = img_data["rotation"] # Restore rotation for this image
+    update_sequence_indicator(self, slot_key)
+    self._hide_available_image(img_path) # Re-hide if it was made available
+    self.status_bar.config(text=f"Undo: Added image back to {slot_key} sequence.")
+
+def _undo_move_sequence(self, slot_key, img_data, old_idx, new_idx):
+    """Moves a sequence image back to its previous position."""
+    sequence = self.result_layout[slot_key] # Reordering leaves the path index unchanged
+
+    # The move left the item at new_idx; only search for it if later edits moved it
+    idx = new_idx if 0 <= new_idx < len(sequence) and sequence[new_idx] == img_data else None
+    if idx is None and img_data in sequence: # Ensure image is still there
+        idx = sequence.index(img_data)
+    if idx is not None:
+        sequence.insert(old_idx, sequence.pop(idx))
+        self.status_bar.config(text=f"Undo: Moved image back in {slot_key} sequence.")
+
+def _undo_rotate(self, img_path, old_rotation, new_rotation):
+    """Restores an image's previous rotation in the list and its slot."""
+    self.image_rotations[img_path] = old_rotation
+    # Thumbnails are cached per rotation, so the old ones are picked up again
+
+    self._refresh_available_thumbnail(img_path)
+    # If the image is currently assigned to a slot, update it there too
+    for slot_name, rect_data in self.layout_rectangles.items():
+        if rect_data["current_image"] == img_path:
+            display_image_in_rectangle(self, slot_name, img_path)
+            break
+    self.status_bar.config(text=f"Undo: Rotated {os.path.basename(img_path)} back.")
+
+# action_type passed to record_action -> function reverting it, bound to the recorded args
+_UNDO_HANDLERS = {
+    "assign": _undo_assign,
+    "unassign": _undo_unassign,
+    "add_sequence": _undo_add_sequence,
+    "remove_sequence": _undo_remove_sequence,
+    "move_sequence": _undo_move_sequence,
+    "rotate": _undo_rotate,
+}
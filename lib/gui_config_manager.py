@@ -2,6 +2,24 @@
 import os
 import json
 
+try:
+    import orjson # Optional, faster JSON encode/decode
+except ImportError:
+    orjson = None
+
+def _dumps_config(config_data):
+    """Serializes config data to indented UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(config_data, option=orjson.OPT_INDENT_2)
+    # Match orjson's output (two-space indent, raw UTF-8) so the file does not change with the backend
+    return json.dumps(config_data, indent=2, ensure_ascii=False).encode("utf-8")
+
+def _loads_config(raw_bytes):
+    """Parses config JSON bytes."""
+    if orjson is not None:
+        return orjson.loads(raw_bytes)
+    return json.loads(raw_bytes)
+
 # Moved from gui_app.py
 CONFIG_FILENAME_ONLY = "gui_config.json"
 # get_persistent_config_dir_path will be imported from gui_utils in gui_app.py
@@ -11,12 +29,22 @@ CONFIG_FILENAME_ONLY = "gui_config.json"
 
 DEFAULT_PHOTOGRAPHER = "Ivor Kerslake" # Also from gui_app.py
 
+_ensured_config_dirs = set() # Directories save_config has already created or found
+
 def save_config(config_file_path, config_data):
     """Saves the configuration data to a JSON file."""
     try:
-        os.makedirs(os.path.dirname(config_file_path), exist_ok=True)
-        with open(config_file_path, "w") as f:
-            json.dump(config_data, f, indent=4) # Added indent for readability
+        config_dir = os.path.dirname(config_file_path)
+        if config_dir not in _ensured_config_dirs:
+            os.makedirs(config_dir, exist_ok=True)
+            _ensured_config_dirs.add(config_dir)
+        # Encode up front and write once; json.dump writes each token separately
+        payload = _dumps_config(config_data)
+        # Write to a temp file and swap it in, so a failed save never leaves a truncated config
+        temp_path = config_file_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(payload)
+        os.replace(temp_path, config_file_path)
         print(f"Config saved: {config_file_path}")
         return True
     except Exception as e:
@@ -28,8 +56,8 @@ def load_config(config_file_path):
     config_data = {}
     try:
         if os.path.exists(config_file_path):
-            with open(config_file_path, "r") as f:
-                config_data = json.load(f)
+            with open(config_file_path, "rb") as f:
+                config_data = _loads_config(f.read())
             print(f"Config loaded: {config_file_path}")
     except Exception as e:
         print(f"Warn: Could not load config from {config_file_path}: {e}")
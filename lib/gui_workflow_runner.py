@@ -4,21 +4,23 @@ import cv2
 import tkinter as tk 
 import re 
 import traceback # Added for error printing
+import tempfile
+import io
+import contextlib
+import multiprocessing
+import concurrent.futures
 
 try:
     import resize_ruler
     import ruler_detector
     from stitch_images_adapter import process_tablet_subfolder
-    from stitch_config import MUSEUM_CONFIGS
-    from object_extractor import extract_and_save_center_object, extract_specific_contour_to_image_array
+    from object_extractor import extract_and_save_center_object
     from remove_background import (
-        create_foreground_mask_from_background as create_foreground_mask,
         select_contour_closest_to_image_center,
-        select_ruler_like_contour_from_list as select_ruler_like_contour,
         get_museum_background_color, 
         detect_dominant_corner_background_color 
     )
-    from raw_processor import convert_raw_image_to_tiff
+    from raw_processor import convert_raw_image_to_tiff, decode_raw_image_to_bgr_array
     from put_images_in_subfolders import group_and_move_files_to_subfolders as organize_files_func # Renamed for clarity
     import ruler_detector_iraq_museum
     # Import new helper functions
@@ -34,16 +36,312 @@ except ImportError as e:
         'module', (), {'estimate_pixels_per_centimeter_from_ruler': _placeholder_func})
     process_tablet_subfolder = _placeholder_func
     extract_and_save_center_object = lambda *a, **kw: (None, None)
-    extract_specific_contour_to_image_array = _placeholder_func
-    create_foreground_mask = _placeholder_func
     select_contour_closest_to_image_center = _placeholder_func
-    select_ruler_like_contour = _placeholder_func
     convert_raw_image_to_tiff = _placeholder_func
+    decode_raw_image_to_bgr_array = _placeholder_func
     organize_files_func = lambda *a: [] # Placeholder for the renamed import
     organize_project_subfolders = lambda *a, **kw: []
     determine_ruler_image_for_scaling = lambda *a, **kw: None
     detect_dominant_corner_background_color = lambda *a, **kw: (0,0,0) # Placeholder for new import
 
+# Kept apart from the processing imports above: without it only the custom layout prompt is lost
+try:
+    from lib.complex_layout_main import ComplexLayoutDialog
+except ImportError as e:
+    print(f"ERROR in gui_workflow_runner.py: Failed to import the layout dialog: {e}")
+    ComplexLayoutDialog = None
+
+# Museums with a fixed digital ruler: SVG file in the assets folder and its physical size in cm.
+# Other museums (British Museum) choose between the 1/2/5 cm templates by object width.
+MUSEUM_RULER_TEMPLATES = {
+    "Iraq Museum": ("IM_photo_ruler.svg", 4.599),
+    "eBL Ruler (CBS)": ("General_eBL_photo_ruler.svg", 4.317),
+    "Non-eBL Ruler (VAM)": ("General_External_photo_ruler.svg", 3.248),
+}
+
+def _whole_percent_progress(progress_callback):
+    """Wraps progress_callback so it only fires when the whole-number percentage changes."""
+    last_percent = [None]
+    def report(value):
+        percent = int(value)
+        if percent != last_percent[0]:
+            last_percent[0] = percent
+            progress_callback(percent)
+    return report
+
+def _compile_view_alternation(view_patterns):
+    """
+    Compiles [(view_key, literal), ...] into one regex with a group per view, so a
+    filename is tested against all of them in a single scan. Returns (regex, view_keys);
+    the matched view is view_keys[match.lastindex - 1]. regex is None if there is nothing to match.
+    """
+    view_keys = [vk for vk, _ in view_patterns]
+    if not view_keys:
+        return None, view_keys
+    return re.compile("|".join(f"({re.escape(literal)})" for _, literal in view_patterns)), view_keys
+
+def _process_subfolder(subfolder_path_item, image_entries, image_files_for_layout,
+                       custom_layout_config, cfg, report_progress=None):
+    """
+    Runs scaling, ruler generation, object extraction and stitching for one subfolder.
+    cfg holds the workflow settings as plain values so this can run in a worker process.
+    report_progress, if given, receives the fraction of this folder that is done.
+    Returns (sets_ok, sets_error, raw_files_converted).
+    """
+    source_folder_path = cfg["source_folder_path"]
+    gui_ruler_position = cfg["gui_ruler_position"]
+    gui_photographer = cfg["gui_photographer"]
+    gui_obj_bg_mode = cfg["gui_obj_bg_mode"]
+    gui_add_logo = cfg["gui_add_logo"]
+    gui_logo_path = cfg["gui_logo_path"]
+    raw_ext_config = cfg["raw_ext_config"]
+    ruler_template_1cm_asset_path = cfg["ruler_template_1cm_asset_path"]
+    ruler_template_2cm_asset_path = cfg["ruler_template_2cm_asset_path"]
+    ruler_template_5cm_asset_path = cfg["ruler_template_5cm_asset_path"]
+    ruler_asset_dir = cfg["ruler_asset_dir"]
+    view_original_suffix_patterns_config = cfg["view_original_suffix_patterns_config"]
+    object_artifact_suffix_config = cfg["object_artifact_suffix_config"]
+    museum_selection = cfg["museum_selection"]
+    if report_progress is None:
+        report_progress = lambda fraction: None
+
+    subfolder_name_item = os.path.basename(subfolder_path_item)
+    sub_steps_alloc = {"layout_dialog": 0.05, "scale": 0.15, "ruler_art": 0.15,
+                       "digital_ruler_choice": 0.05, "digital_ruler_resize": 0.1, "other_obj": 0.25, "stitch": 0.25}
+    accumulated_sub_progress = sub_steps_alloc["layout_dialog"] # The layout was chosen before processing started
+    cr2_converted = 0
+
+    rel_count = 0
+    orig_views_fps = {}
+
+    # Per-folder lookups hoisted out of the file loop: the reverse/top/bottom suffixes
+    # anywhere in the name, and the "<folder><suffix>" view prefixes at its start
+    fallback_suffix_re, fallback_view_keys = _compile_view_alternation([
+        (vk, view_original_suffix_patterns_config[vk])
+        for vk in ("reverse", "top", "bottom")
+        if view_original_suffix_patterns_config.get(vk) is not None
+    ])
+    view_prefix_re, prefix_view_keys = _compile_view_alternation([
+        (vk, (subfolder_name_item + os.path.splitext(sp_pattern_suffix)[0]).lower())
+        for vk, sp_pattern_suffix in view_original_suffix_patterns_config.items()
+        if sp_pattern_suffix
+    ])
+    fallback_views_fps = {}
+
+    # Names were filtered to image extensions when the folder was scanned
+    for fn, full_fp in image_entries: 
+        fn_low = fn.lower()
+        if object_artifact_suffix_config not in fn and \
+           "_scaled_ruler." not in fn and \
+           "temp_isolated_ruler" not in fn and \
+           not fn_low.endswith("_rawscale.tif"): 
+            rel_count += 1
+
+        suffix_match = fallback_suffix_re.search(fn_low) if fallback_suffix_re else None
+        if suffix_match:
+            fallback_views_fps[fallback_view_keys[suffix_match.lastindex - 1]] = full_fp
+
+        prefix_match = view_prefix_re.match(fn_low) if view_prefix_re else None
+        if prefix_match:
+            orig_views_fps[prefix_view_keys[prefix_match.lastindex - 1]] = full_fp
+
+    pr02_reverse = fallback_views_fps.get("reverse")
+    pr03_top = fallback_views_fps.get("top")
+    pr04_bottom = fallback_views_fps.get("bottom")
+
+    ruler_for_scale_fp = determine_ruler_image_for_scaling(
+        custom_layout_config, orig_views_fps, image_files_for_layout, 
+        pr02_reverse, pr03_top, pr04_bottom, rel_count
+    )
+
+    if not ruler_for_scale_fp:
+        print(f"   No ruler image found for {subfolder_name_item}. Skip.")
+        print("-"*40)
+        return 0, 1, 0
+
+    # RAW conversions and the isolated ruler go to a private directory, so they never
+    # end up among the set's files and are removed even if processing fails
+    temp_dir = tempfile.TemporaryDirectory(prefix="ebl_")
+
+    def temp_tiff_path(raw_fp):
+        return os.path.join(temp_dir.name, f"{os.path.splitext(os.path.basename(raw_fp))[0]}.tif")
+
+    try:
+        # The ruler image is decoded once, straight to an array when it is a RAW (the slowest
+        # step), and that array serves scale detection, background detection and extraction
+        if ruler_for_scale_fp.lower().endswith(raw_ext_config):
+            img_for_bg_detection = decode_raw_image_to_bgr_array(ruler_for_scale_fp)
+            cr2_converted += 1
+        else:
+            img_for_bg_detection = cv2.imread(ruler_for_scale_fp)
+        if img_for_bg_detection is None:
+            raise ValueError(f"Failed to load image for background detection: {ruler_for_scale_fp}")
+
+        if museum_selection == "Iraq Museum":
+            print(f"   Using Iraq Museum specific ruler detector for {os.path.basename(ruler_for_scale_fp)}...")
+            px_cm_val = ruler_detector_iraq_museum.detect_1cm_distance_iraq(
+                ruler_for_scale_fp, preloaded_image_array=img_for_bg_detection)
+            if px_cm_val is None or px_cm_val <= 0:
+                raise ValueError("Iraq Museum ruler detection failed to return a valid pixels/cm value.")
+            print(f"     Iraq Museum ruler detector returned px/cm: {px_cm_val}")
+        else:
+            px_cm_val = ruler_detector.estimate_pixels_per_centimeter_from_ruler(
+                ruler_for_scale_fp, ruler_position=gui_ruler_position, preloaded_image_array=img_for_bg_detection)
+
+        accumulated_sub_progress += sub_steps_alloc["scale"]
+        report_progress(accumulated_sub_progress)
+
+        # Only names the artifact; the pixels come from the array above
+        path_ruler_extract_img = ruler_for_scale_fp
+
+        detected_bg_color_from_image = detect_dominant_corner_background_color(img_for_bg_detection)
+
+        output_bg_color = get_museum_background_color(museum_selection=museum_selection, detected_bg_color=detected_bg_color_from_image)
+
+        art_fp, _ = extract_and_save_center_object(
+            path_ruler_extract_img, 
+            source_background_detection_mode=gui_obj_bg_mode, 
+            output_image_background_color=output_bg_color,
+            output_filename_suffix=object_artifact_suffix_config,
+            museum_selection=museum_selection,
+            preloaded_image_bgr_array=img_for_bg_detection,
+            output_directory=subfolder_path_item
+        )
+
+        accumulated_sub_progress += sub_steps_alloc["ruler_art"]
+        report_progress(accumulated_sub_progress)
+
+        chosen_ruler_tpl = ruler_template_5cm_asset_path
+        custom_ruler_size_cm = None
+
+        fixed_ruler = MUSEUM_RULER_TEMPLATES.get(museum_selection)
+        if fixed_ruler:
+            ruler_svg_name, custom_ruler_size_cm = fixed_ruler
+            chosen_ruler_tpl = os.path.join(ruler_asset_dir, ruler_svg_name)
+            print(f"Using {museum_selection} ruler: {chosen_ruler_tpl}")
+        elif museum_selection == "British Museum":
+            # Only this choice depends on the artifact's size, so only it reads the image back
+            art_img_chk = cv2.imread(art_fp)
+            if art_img_chk is not None and px_cm_val > 0:
+                art_w_cm_val = art_img_chk.shape[1] / px_cm_val
+                if art_w_cm_val > 0:
+                    t1 = resize_ruler.RULER_TARGET_PHYSICAL_WIDTHS_CM["1cm"]
+                    t2 = resize_ruler.RULER_TARGET_PHYSICAL_WIDTHS_CM["2cm"]
+                    if art_w_cm_val < t1:
+                        chosen_ruler_tpl = ruler_template_1cm_asset_path
+                    elif art_w_cm_val < t2:
+                        chosen_ruler_tpl = ruler_template_2cm_asset_path
+
+        accumulated_sub_progress += sub_steps_alloc["digital_ruler_choice"]
+        report_progress(accumulated_sub_progress)
+
+        try:
+            resize_ruler.resize_and_save_ruler_template(
+                px_cm_val, 
+                chosen_ruler_tpl, 
+                subfolder_name_item, 
+                subfolder_path_item, 
+                custom_ruler_size_cm=custom_ruler_size_cm
+            )
+            print(f"    Successfully generated/resized digital ruler: {chosen_ruler_tpl} for {subfolder_name_item}.")
+        except Exception as e_ruler_gen:
+            print(f"    ERROR during digital ruler generation/resizing: {e_ruler_gen}")
+
+        accumulated_sub_progress += sub_steps_alloc["digital_ruler_resize"]
+        report_progress(accumulated_sub_progress)
+
+        other_views_to_process_list = []
+        if custom_layout_config:
+            all_custom_assigned_paths = set()
+            for key, value in custom_layout_config.items():
+                if isinstance(value, str) and value: 
+                    all_custom_assigned_paths.add(value)
+                elif isinstance(value, list):
+                    for item_path in value:
+                        if item_path: all_custom_assigned_paths.add(item_path)
+
+            other_views_to_process_list = [p for p in all_custom_assigned_paths if p != ruler_for_scale_fp]
+        else:
+            other_views_to_process_list = [
+                fp_other for fp_other in orig_views_fps.values() if fp_other != ruler_for_scale_fp]
+
+        num_other_views = len(other_views_to_process_list)
+        prog_per_other_view = sub_steps_alloc["other_obj"] / num_other_views if num_other_views > 0 else 0
+        current_other_views_prog = 0.0
+
+        def extract_one_view(view_fp):
+            """
+            Converts view_fp to TIFF if it is a RAW, then extracts its object.
+            Runs on a worker thread; returns the TIFF it converted, or None.
+            """
+            new_tiff_fp = None
+            curr_o_path = view_fp
+            if view_fp.lower().endswith(raw_ext_config):
+                new_tiff_fp = curr_o_path = temp_tiff_path(view_fp)
+                convert_raw_image_to_tiff(view_fp, new_tiff_fp)
+            extract_and_save_center_object(
+                curr_o_path, 
+                source_background_detection_mode=gui_obj_bg_mode,
+                output_image_background_color=output_bg_color, 
+                output_filename_suffix=object_artifact_suffix_config,
+                museum_selection=museum_selection,
+                output_directory=subfolder_path_item
+            )
+            return new_tiff_fp
+
+        # The views are independent and their RAW decoding and OpenCV work release the GIL,
+        # so several run at once. Each holds full-size images, hence the small cap.
+        # Results, conversion counts and progress are handled on this thread.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(4, num_other_views))) as view_executor:
+            view_futures = {view_executor.submit(extract_one_view, o_fp): o_fp for o_fp in other_views_to_process_list}
+            for future in concurrent.futures.as_completed(view_futures):
+                if future.result():
+                    cr2_converted += 1
+                current_other_views_prog += prog_per_other_view
+                report_progress(accumulated_sub_progress + current_other_views_prog)
+        accumulated_sub_progress += sub_steps_alloc["other_obj"]
+
+        # get_museum_background_color keeps the detected dark background for the British Museum
+        # and gives white for every other museum, the same colours MUSEUM_CONFIGS lists for them,
+        # so the stitched image uses the extraction colour directly
+        process_tablet_subfolder(
+            subfolder_path=subfolder_path_item,
+            main_input_folder_path=source_folder_path,
+            output_base_name=subfolder_name_item,
+            pixels_per_cm=px_cm_val,
+            photographer_name=gui_photographer,
+            ruler_image_for_scale_path=ruler_for_scale_fp, 
+            add_logo=gui_add_logo,
+            logo_path=gui_logo_path if gui_add_logo else None,
+            object_extraction_background_mode=gui_obj_bg_mode, 
+            stitched_bg_color=output_bg_color, 
+            custom_layout=custom_layout_config 
+        )
+        return 1, 0, cr2_converted
+    except Exception as e:
+        print(f"   ERROR processing set '{subfolder_name_item}': {e}")
+        traceback.print_exc() # Add this to print the full traceback
+        return 0, 1, cr2_converted
+    finally:
+        temp_dir.cleanup()
+        report_progress(1.0)
+        print("-" * 40)
+
+
+def _process_subfolder_in_worker(*args):
+    """
+    Process pool entry point: runs _process_subfolder and returns its counts together with
+    everything it printed, since a worker's output does not reach the GUI log.
+    """
+    log_buffer = io.StringIO()
+    with contextlib.redirect_stdout(log_buffer), contextlib.redirect_stderr(log_buffer):
+        counts = _process_subfolder(*args)
+    return counts, log_buffer.getvalue()
+
+def _subfolder_worker_count(num_jobs):
+    """Half the cores, leaving room for the GUI and for OpenCV's own threads."""
+    return max(1, min(num_jobs, (os.cpu_count() or 2) // 2))
+
 def run_complete_image_processing_workflow(
     source_folder_path, gui_ruler_position, gui_photographer,
     gui_obj_bg_mode, gui_add_logo, gui_logo_path,
@@ -52,14 +350,14 @@ def run_complete_image_processing_workflow(
     ruler_template_2cm_asset_path,
     ruler_template_5cm_asset_path,
     view_original_suffix_patterns_config,
-    temp_extracted_ruler_filename_config,
     object_artifact_suffix_config,
     progress_callback,
     finished_callback,
     museum_selection="British Museum",
     app_root_window=None 
 ):
-    from lib.complex_layout_main import ComplexLayoutDialog
+    # Each update redraws the GUI's progress bar; skip ones that would not move it
+    progress_callback = _whole_percent_progress(progress_callback)
 
     print(f"Workflow started for folder: {source_folder_path}")
     progress_callback(2)
@@ -67,6 +365,8 @@ def run_complete_image_processing_workflow(
     # Prepare all image extensions for checking
     image_extensions_tuple = tuple(ext.lower() for ext in valid_img_exts_config) + \
                            ((raw_ext_config.lower(),) if isinstance(raw_ext_config, str) else tuple(r_ext.lower() for r_ext in raw_ext_config))
+    image_extensions_tuple = tuple(dict.fromkeys(image_extensions_tuple)) # Drop duplicates, keep order
+    image_extensions_set = frozenset(image_extensions_tuple) # One hash lookup per file name
 
     try:
         processed_subfolders = organize_project_subfolders(source_folder_path, image_extensions_tuple, organize_files_func)
@@ -88,28 +388,38 @@ def run_complete_image_processing_workflow(
         finished_callback()
         return
 
-    total_ok, total_err, cr2_conv_total = 0, 0, 0
-    prog_per_folder = 85.0 / num_folders if num_folders > 0 else 0
+    cfg = {
+        "source_folder_path": source_folder_path,
+        "gui_ruler_position": gui_ruler_position,
+        "gui_photographer": gui_photographer,
+        "gui_obj_bg_mode": gui_obj_bg_mode,
+        "gui_add_logo": gui_add_logo,
+        "gui_logo_path": gui_logo_path,
+        "raw_ext_config": raw_ext_config,
+        "ruler_template_1cm_asset_path": ruler_template_1cm_asset_path,
+        "ruler_template_2cm_asset_path": ruler_template_2cm_asset_path,
+        "ruler_template_5cm_asset_path": ruler_template_5cm_asset_path,
+        "ruler_asset_dir": os.path.dirname(ruler_template_1cm_asset_path),
+        "view_original_suffix_patterns_config": view_original_suffix_patterns_config,
+        "object_artifact_suffix_config": object_artifact_suffix_config,
+        "museum_selection": museum_selection,
+    }
 
+    # Layout dialogs need the Tk window, so all prompts happen here before any
+    # folder is handed to a worker process.
+    subfolder_jobs = []
     for i, subfolder_path_item in enumerate(processed_subfolders):
         subfolder_name_item = os.path.basename(subfolder_path_item)
         print(
-            f"Processing Subfolder {i+1}/{num_folders}: {subfolder_name_item}")
-
-        current_prog_base = 10 + i * prog_per_folder
-        progress_callback(current_prog_base)
+            f"Scanning Subfolder {i+1}/{num_folders}: {subfolder_name_item}")
 
-        sub_steps_alloc = {"layout_dialog": 0.05, "scale": 0.15, "ruler_art": 0.1, "ruler_part_extract": 0.05,
-                           "digital_ruler_choice": 0.05, "digital_ruler_resize": 0.1, "other_obj": 0.25, "stitch": 0.25}
-        accumulated_sub_progress = 0.0
-
-        all_files_in_subfolder = [f for f in os.listdir(subfolder_path_item) if os.path.isfile(
-            os.path.join(subfolder_path_item, f))]
+        # scandir reports the file type with each entry, so no extra stat per file
+        with os.scandir(subfolder_path_item) as dir_entries:
+            # (name, full path) pairs; DirEntry already holds the joined path
+            image_entries = [(entry.name, entry.path) for entry in dir_entries
+                             if entry.is_file() and os.path.splitext(entry.name)[1].lower() in image_extensions_set]
         
-        image_files_for_layout = []
-        for f_name in all_files_in_subfolder:
-            if f_name.lower().endswith(image_extensions_tuple):
-                image_files_for_layout.append(os.path.join(subfolder_path_item, f_name))
+        image_files_for_layout = [full_fp for _, full_fp in image_entries]
         
         custom_layout_config = None
         typical_counts = [1, 2, 6] 
@@ -125,7 +435,9 @@ def run_complete_image_processing_workflow(
                         except tk.TclError:
                             pass 
             
-            if root_tk_window:
+            if ComplexLayoutDialog is None:
+                print("   WARNING: ComplexLayoutDialog is unavailable. Skipping custom layout.")
+            elif root_tk_window:
                 dialog = ComplexLayoutDialog(parent=root_tk_window, image_paths=image_files_for_layout)
                 custom_layout_config = dialog.get_layout_config()
                 if custom_layout_config:
@@ -134,247 +446,47 @@ def run_complete_image_processing_workflow(
                     print(f"   Custom layout cancelled for {subfolder_name_item}.")
             else:
                 print("   WARNING: Could not get root Tk window for ComplexLayoutDialog. Skipping custom layout.")
-        
-        accumulated_sub_progress += sub_steps_alloc["layout_dialog"] * prog_per_folder
-        progress_callback(current_prog_base + accumulated_sub_progress)
-
-        rel_count = 0
-        pr02_reverse, pr03_top, pr04_bottom = None, None, None
-        orig_views_fps = {}
-
-        for fn in all_files_in_subfolder: 
-            fn_low = fn.lower()
-            full_fp = os.path.join(subfolder_path_item, fn)
-            if fn_low.endswith(image_extensions_tuple): 
-                if object_artifact_suffix_config not in fn and \
-                   "_scaled_ruler." not in fn and \
-                   "temp_isolated_ruler" not in fn and \
-                   not fn_low.endswith("_rawscale.tif"): 
-                    rel_count += 1
-
-                if "reverse" in view_original_suffix_patterns_config and view_original_suffix_patterns_config["reverse"] in fn_low:
-                    pr02_reverse = full_fp
-                if "top" in view_original_suffix_patterns_config and view_original_suffix_patterns_config["top"] in fn_low:
-                    pr03_top = full_fp
-                if "bottom" in view_original_suffix_patterns_config and view_original_suffix_patterns_config["bottom"] in fn_low:
-                    pr04_bottom = full_fp
-                
-                for vk, sp_pattern_suffix in view_original_suffix_patterns_config.items():
-                    if not sp_pattern_suffix: 
-                        continue
-                    core_pattern = os.path.splitext(sp_pattern_suffix)[0] 
-                    expected_prefix_in_filename = subfolder_name_item + core_pattern
-                    
-                    if fn_low.startswith(expected_prefix_in_filename.lower()):
-                         orig_views_fps[vk] = full_fp
-
-        ruler_for_scale_fp = determine_ruler_image_for_scaling(
-            custom_layout_config, orig_views_fps, image_files_for_layout, 
-            pr02_reverse, pr03_top, pr04_bottom, rel_count
-        )
 
-        if not ruler_for_scale_fp:
-            print(f"   No ruler image found for {subfolder_name_item}. Skip.")
-            total_err += 1
-            print("-"*40)
-            continue
+        subfolder_jobs.append(
+            (subfolder_path_item, image_entries, image_files_for_layout, custom_layout_config, cfg))
 
-        try:
-            curr_scale_fp, is_temp_s_file = ruler_for_scale_fp, False
-            if curr_scale_fp.lower().endswith(raw_ext_config):
-                tmp_s_fp = os.path.join(
-                    subfolder_path_item, f"{os.path.splitext(os.path.basename(curr_scale_fp))[0]}_rawscale.tif")
-                convert_raw_image_to_tiff(curr_scale_fp, tmp_s_fp)
-                curr_scale_fp, is_temp_s_file = tmp_s_fp, True
-                cr2_conv_total += 1
-
-            if museum_selection == "Iraq Museum":
-                print(f"   Using Iraq Museum specific ruler detector for {os.path.basename(curr_scale_fp)}...")
-                px_cm_val = ruler_detector_iraq_museum.detect_1cm_distance_iraq(curr_scale_fp)
-                if px_cm_val is None or px_cm_val <= 0:
-                    raise ValueError("Iraq Museum ruler detection failed to return a valid pixels/cm value.")
-                print(f"     Iraq Museum ruler detector returned px/cm: {px_cm_val}")
-            else:
-                px_cm_val = ruler_detector.estimate_pixels_per_centimeter_from_ruler(
-                    curr_scale_fp, ruler_position=gui_ruler_position)
-            
-            if is_temp_s_file and os.path.exists(curr_scale_fp):
-                os.remove(curr_scale_fp)
-            accumulated_sub_progress += sub_steps_alloc["scale"] * \
-                prog_per_folder
-            progress_callback(current_prog_base + accumulated_sub_progress)
-
-            path_ruler_extract_img, tmp_ruler_extract_conv_file = ruler_for_scale_fp, None
-            if path_ruler_extract_img.lower().endswith(raw_ext_config):
-                tmp_ruler_extract_conv_file = os.path.join(
-                    subfolder_path_item, f"{os.path.splitext(os.path.basename(path_ruler_extract_img))[0]}.tif")
-                if not os.path.exists(tmp_ruler_extract_conv_file):
-                    convert_raw_image_to_tiff(
-                        path_ruler_extract_img, tmp_ruler_extract_conv_file)
-                path_ruler_extract_img = tmp_ruler_extract_conv_file
-            
-            img_for_bg_detection = cv2.imread(path_ruler_extract_img)
-            if img_for_bg_detection is None:
-                raise ValueError(f"Failed to load image for background detection: {path_ruler_extract_img}")
-            
-            detected_bg_color_from_image = detect_dominant_corner_background_color(img_for_bg_detection)
-            
-            output_bg_color = get_museum_background_color(museum_selection=museum_selection, detected_bg_color=detected_bg_color_from_image)
-            
-            art_fp, art_cont = extract_and_save_center_object(
-                path_ruler_extract_img, 
-                source_background_detection_mode=gui_obj_bg_mode, 
-                output_image_background_color=output_bg_color,
-                output_filename_suffix=object_artifact_suffix_config,
-                museum_selection=museum_selection
-            )
-            
-            accumulated_sub_progress += sub_steps_alloc["ruler_art"] * \
-                prog_per_folder
-            progress_callback(current_prog_base + accumulated_sub_progress)
+    total_ok, total_err, cr2_conv_total = 0, 0, 0
+    prog_per_folder = 85.0 / num_folders if num_folders > 0 else 0
+    num_workers = _subfolder_worker_count(num_folders)
+    print("-" * 50)
 
-            ruler_loaded_arr = cv2.imread(path_ruler_extract_img)
-            if ruler_loaded_arr is None:
-                raise ValueError(f"Fail reload {path_ruler_extract_img}")
-            
-            all_m = create_foreground_mask(ruler_loaded_arr, detected_bg_color_from_image, 40)
-            all_c, _ = cv2.findContours(
-                all_m, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            ruler_c = select_ruler_like_contour(
-                all_c, ruler_loaded_arr.shape[1], ruler_loaded_arr.shape[0], excluded_obj_contour=art_cont)
-
-            tmp_iso_ruler_fp = None
-            if ruler_c is not None:
-                ext_ruler_arr = extract_specific_contour_to_image_array(
-                    ruler_loaded_arr, ruler_c, detected_bg_color_from_image, 5) 
-                tmp_iso_ruler_fp = os.path.join(
-                    subfolder_path_item, temp_extracted_ruler_filename_config)
-                cv2.imwrite(tmp_iso_ruler_fp, ext_ruler_arr)
-            else:
-                print("     Warning: Could not isolate physical ruler part.")
-            if tmp_ruler_extract_conv_file and os.path.exists(tmp_ruler_extract_conv_file):
-                os.remove(tmp_ruler_extract_conv_file)
-            accumulated_sub_progress += sub_steps_alloc["ruler_part_extract"] * \
-                prog_per_folder
-            progress_callback(current_prog_base + accumulated_sub_progress)
-            
-            art_img_chk = cv2.imread(art_fp)
-            chosen_ruler_tpl = ruler_template_5cm_asset_path
-            custom_ruler_size_cm = None
-            
-            if museum_selection == "British Museum":
-                if art_img_chk is not None and px_cm_val > 0:
-                    art_w_cm_val = art_img_chk.shape[1] / px_cm_val
-                    if art_w_cm_val > 0:
-                        t1 = resize_ruler.RULER_TARGET_PHYSICAL_WIDTHS_CM["1cm"]
-                        t2 = resize_ruler.RULER_TARGET_PHYSICAL_WIDTHS_CM["2cm"]
-                        if art_w_cm_val < t1:
-                            chosen_ruler_tpl = ruler_template_1cm_asset_path
-                        elif art_w_cm_val < t2:
-                            chosen_ruler_tpl = ruler_template_2cm_asset_path
-            elif museum_selection == "Iraq Museum":
-                chosen_ruler_tpl = os.path.join(os.path.dirname(ruler_template_1cm_asset_path), "IM_photo_ruler.svg")
-                custom_ruler_size_cm = 4.599
-                print(f"Using Iraq Museum ruler: {chosen_ruler_tpl}")
-            elif museum_selection == "eBL Ruler (CBS)":
-                chosen_ruler_tpl = os.path.join(os.path.dirname(ruler_template_1cm_asset_path), "General_eBL_photo_ruler.svg")
-                custom_ruler_size_cm = 4.317
-                print(f"Using eBL Ruler (CBS): {chosen_ruler_tpl}")
-            elif museum_selection == "Non-eBL Ruler (VAM)":
-                chosen_ruler_tpl = os.path.join(os.path.dirname(ruler_template_1cm_asset_path), "General_External_photo_ruler.svg")
-                custom_ruler_size_cm = 3.248
-                print(f"Using Non-eBL Ruler (VAM): {chosen_ruler_tpl}")
-            
-            accumulated_sub_progress += sub_steps_alloc["digital_ruler_choice"] * \
-                prog_per_folder
-            progress_callback(current_prog_base + accumulated_sub_progress)
-
-            try:
-                resize_ruler.resize_and_save_ruler_template(
-                    px_cm_val, 
-                    chosen_ruler_tpl, 
-                    subfolder_name_item, 
-                    subfolder_path_item, 
-                    custom_ruler_size_cm=custom_ruler_size_cm
-                )
-                print(f"    Successfully generated/resized digital ruler: {chosen_ruler_tpl} for {subfolder_name_item}.")
-            except Exception as e_ruler_gen:
-                print(f"    ERROR during digital ruler generation/resizing: {e_ruler_gen}")
-
-            if tmp_iso_ruler_fp and os.path.exists(tmp_iso_ruler_fp):
-                os.remove(tmp_iso_ruler_fp)
-            accumulated_sub_progress += sub_steps_alloc["digital_ruler_resize"] * \
-                prog_per_folder
-            progress_callback(current_prog_base + accumulated_sub_progress)
-
-            other_views_to_process_list = []
-            if custom_layout_config:
-                all_custom_assigned_paths = set()
-                for key, value in custom_layout_config.items():
-                    if isinstance(value, str) and value: 
-                        all_custom_assigned_paths.add(value)
-                    elif isinstance(value, list):
-                        for item_path in value:
-                            if item_path: all_custom_assigned_paths.add(item_path)
-                
-                other_views_to_process_list = [p for p in all_custom_assigned_paths if p != ruler_for_scale_fp]
-            else:
-                other_views_to_process_list = [
-                    fp_other for fp_other in orig_views_fps.values() if fp_other != ruler_for_scale_fp]
-            
-            num_other_views = len(other_views_to_process_list)
-            prog_per_other_view = (
-                sub_steps_alloc["other_obj"] * prog_per_folder) / num_other_views if num_other_views > 0 else 0
-            current_other_views_prog = 0.0
-
-            for idx_other, o_fp_to_extract in enumerate(other_views_to_process_list):
-                curr_o_path, is_temp_o = o_fp_to_extract, False
-                if o_fp_to_extract.lower().endswith(raw_ext_config):
-                    tmp_o_p = os.path.join(
-                        subfolder_path_item, f"{os.path.splitext(os.path.basename(o_fp_to_extract))[0]}.tif")
-                    convert_raw_image_to_tiff(o_fp_to_extract, tmp_o_p)
-                    curr_o_path, is_temp_o = tmp_o_p, True
-                    cr2_conv_total += 1
-                extract_and_save_center_object(
-                    curr_o_path, 
-                    source_background_detection_mode=gui_obj_bg_mode,
-                    output_image_background_color=output_bg_color, 
-                    output_filename_suffix=object_artifact_suffix_config,
-                    museum_selection=museum_selection
-                )
-                    
-                if is_temp_o and os.path.exists(curr_o_path):
-                    os.remove(curr_o_path)
-                current_other_views_prog += prog_per_other_view
-                progress_callback(
-                    current_prog_base + accumulated_sub_progress + current_other_views_prog)
-            accumulated_sub_progress += sub_steps_alloc["other_obj"] * prog_per_folder 
-            
-            stitched_output_bg_color = MUSEUM_CONFIGS.get(museum_selection, {}).get("background_color", (0, 0, 0))
-            if museum_selection == "British Museum": 
-                stitched_output_bg_color = output_bg_color
-
-            process_tablet_subfolder(
-                subfolder_path=subfolder_path_item,
-                main_input_folder_path=source_folder_path,
-                output_base_name=subfolder_name_item,
-                pixels_per_cm=px_cm_val,
-                photographer_name=gui_photographer,
-                ruler_image_for_scale_path=ruler_for_scale_fp, 
-                add_logo=gui_add_logo,
-                logo_path=gui_logo_path if gui_add_logo else None,
-                object_extraction_background_mode=gui_obj_bg_mode, 
-                stitched_bg_color=stitched_output_bg_color, 
-                custom_layout=custom_layout_config 
-            )
-            total_ok += 1
-        except Exception as e:
-            print(f"   ERROR processing set '{subfolder_name_item}': {e}")
-            traceback.print_exc() # Add this to print the full traceback
-            total_err += 1
-        finally:
-            progress_callback(current_prog_base + prog_per_folder)
-            print("-" * 40)
+    if num_workers == 1:
+        # Nothing to run alongside, so process in this thread and keep per-step progress
+        for i, job in enumerate(subfolder_jobs):
+            print(f"Processing Subfolder {i+1}/{num_folders}: {os.path.basename(job[0])}")
+            current_prog_base = 10 + i * prog_per_folder
+            progress_callback(current_prog_base)
+            ok, err, cr2 = _process_subfolder(
+                *job, report_progress=lambda fraction: progress_callback(current_prog_base + fraction * prog_per_folder))
+            total_ok, total_err, cr2_conv_total = total_ok + ok, total_err + err, cr2_conv_total + cr2
+    else:
+        # Folders are independent and CPU-bound (RAW decoding, contour search, stitching),
+        # so they run in separate processes. Progress advances as each folder finishes and
+        # its log is printed in one piece then. Workers are spawned rather than forked so
+        # they do not inherit the GUI's threads and Tk state.
+        print(f"Processing {num_folders} subfolders with {num_workers} worker processes.")
+        # Largest folders first, so a big one does not start last and run on its own
+        subfolder_jobs.sort(key=lambda job: len(job[1]), reverse=True)
+        mp_context = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context) as executor:
+            future_to_folder = {executor.submit(_process_subfolder_in_worker, *job): job[0] for job in subfolder_jobs}
+            for done_count, future in enumerate(concurrent.futures.as_completed(future_to_folder), start=1):
+                subfolder_name_item = os.path.basename(future_to_folder[future])
+                print(f"Finished Subfolder {done_count}/{num_folders}: {subfolder_name_item}")
+                try:
+                    (ok, err, cr2), folder_log = future.result()
+                    print(folder_log, end="")
+                except Exception as e:
+                    print(f"   ERROR processing set '{subfolder_name_item}': {e}")
+                    print("-" * 40)
+                    ok, err, cr2 = 0, 1, 0
+                total_ok, total_err, cr2_conv_total = total_ok + ok, total_err + err, cr2_conv_total + cr2
+                progress_callback(10 + done_count * prog_per_folder)
 
     print(
         f"\n--- Processing Complete ---\nRAW converted: {cr2_conv_total}\nSets OK: {total_ok}\nSets Error: {total_err}\n")
@@ -108,10 +108,15 @@ def extract_and_save_center_object( # Renamed from your provided file for consis
     background_color_tolerance_value=DEFAULT_BACKGROUND_DETECTION_COLOR_TOLERANCE,
     min_object_area_as_image_fraction=DEFAULT_MINIMUM_OBJECT_CONTOUR_AREA_FRACTION,
     object_contour_smoothing_kernel_size=DEFAULT_OBJECT_CONTOUR_SMOOTHING_KERNEL_SIZE,
-    museum_selection=None
+    museum_selection=None,
+    preloaded_image_bgr_array=None,
+    output_directory=None
 ):
     print(f"  Extracting central object from: {os.path.basename(input_image_filepath)}")
-    original_image_bgr_array = cv2.imread(input_image_filepath)
+    # Callers that already decoded the image pass it in to skip a second full read
+    original_image_bgr_array = preloaded_image_bgr_array
+    if original_image_bgr_array is None:
+        original_image_bgr_array = cv2.imread(input_image_filepath)
     if original_image_bgr_array is None: 
         raise FileNotFoundError(f"Could not load image for object extraction: {input_image_filepath}")
         
@@ -142,6 +147,8 @@ def extract_and_save_center_object( # Renamed from your provided file for consis
     )
     
     base_filepath, _ = os.path.splitext(input_image_filepath)
+    if output_directory: # Input is a temporary copy; save the artifact where the set lives
+        base_filepath = os.path.join(output_directory, os.path.basename(base_filepath))
     output_image_filepath = f"{base_filepath}{output_filename_suffix}"
     try:
         if not cv2.imwrite(output_image_filepath, extracted_artifact_image_array): 
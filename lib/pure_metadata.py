@@ -9,6 +9,7 @@ import datetime
 import piexif
 import cv2
 import shutil
+from contextlib import suppress
 
 # Try to import pyexiv2 modules (multiple possible package names)
 pyexiv2 = None
@@ -79,13 +80,12 @@ def set_basic_exif_metadata(image_path, image_title, photographer_name, institut
                         if cv2.imwrite(temp_path, img):
                             try:
                                 piexif.insert(exif_bytes, temp_path)
-                                os.remove(image_path)
-                                os.rename(temp_path, image_path)
+                                os.replace(temp_path, image_path) # Overwrites the original in one step
                                 print(f"      EXIF metadata applied successfully via alternative method.")
                                 return True
                             except Exception as alt_err:
                                 print(f"      Error with alternative method: {alt_err}")
-                                if os.path.exists(temp_path):
+                                with suppress(FileNotFoundError):
                                     os.remove(temp_path)
                                 return False
                 raise insert_err
@@ -127,30 +127,52 @@ def clean_image_metadata(image_path):
             
         if not write_success:
             print(f"      Warning: cv2.imwrite failed for temporary file: {temp_file_path}")
-            if os.path.exists(temp_file_path): # Attempt to remove if partially created
-                try:
-                    os.remove(temp_file_path)
-                except Exception as e_rem:
-                    print(f"        Could not remove partially written temp file {temp_file_path}: {e_rem}")
+            try: # Attempt to remove if partially created
+                os.remove(temp_file_path)
+            except FileNotFoundError:
+                pass
+            except Exception as e_rem:
+                print(f"        Could not remove partially written temp file {temp_file_path}: {e_rem}")
             return False
             
         # If imwrite was successful, the temporary file should exist.
         # Replace original with cleaned version
-        os.remove(image_path)
-        os.rename(temp_file_path, image_path)
+        os.replace(temp_file_path, image_path)
         print(f"      Successfully cleaned image metadata for {os.path.basename(image_path)}.")
         return True
 
     except Exception as clean_err:
         print(f"      Warning: Failed to clean image metadata for {os.path.basename(image_path)}: {clean_err}")
         # If temp file path was defined and exists, try to clean it up
-        if temp_file_path and os.path.exists(temp_file_path):
+        if temp_file_path:
             try:
                 os.remove(temp_file_path)
+            except FileNotFoundError:
+                pass
             except Exception as e_rem_err:
                  print(f"        Could not remove temp file {temp_file_path} during error cleanup: {e_rem_err}")
         return False
 
+def detect_problematic_metadata(image_path):
+    """Returns True if the file header carries the JSON shape data that breaks metadata writing."""
+    with open(image_path, 'rb') as f:
+        file_start = f.read(1000)  # Read first 1000 bytes to check
+    return b'{"shape"' in file_start
+
+def ensure_clean_metadata(image_path):
+    """
+    Cleans the image only if detect_problematic_metadata finds shape data; most files are
+    already clean and skip the decode/re-encode entirely. Returns True if the file is clean.
+    """
+    try:
+        if not detect_problematic_metadata(image_path):
+            return True
+    except Exception as e:
+        print(f"      Warning: Error checking for shape data: {e}")
+        return False
+    print("      Detected problematic shape data, cleaning...")
+    return clean_image_metadata(image_path)
+
 def apply_all_metadata(
     image_path, 
     image_title, 
@@ -183,16 +205,8 @@ def apply_all_metadata(
     print(f"    Setting metadata for: {os.path.basename(image_path)}")
     
     # Try to fix any problematic metadata first
-    try:
-        # For TIFF files, check for shape data
-        if is_tiff:
-            with open(image_path, 'rb') as f:
-                file_start = f.read(1000)  # Read first 1000 bytes to check
-                if b'{"shape"' in file_start:
-                    print("      Detected problematic shape data, cleaning...")
-                    clean_image_metadata(image_path)
-    except Exception as e:
-        print(f"      Warning: Error checking for shape data: {e}")
+    if is_tiff:
+        ensure_clean_metadata(image_path)
     
     # If exiv2 module is available, use it for comprehensive metadata handling
     if pyexiv2:
@@ -263,9 +277,11 @@ def apply_all_metadata(
             print(f"      All metadata (EXIF, XMP) applied successfully via {exiv2_module_name}.")
             
             # If we successfully wrote metadata and closed the image, remove the backup
-            if backup_path and os.path.exists(backup_path):
+            if backup_path:
                 try:
                     os.remove(backup_path)
+                except FileNotFoundError:
+                    pass
                 except Exception as e_rem_backup:
                     print(f"      Warning: Could not remove backup file {backup_path}: {e_rem_backup}")
                     
@@ -283,7 +299,7 @@ def apply_all_metadata(
                         img.close()
                         img = None
 
-                    if os.path.exists(image_path):
+                    with suppress(FileNotFoundError):
                         os.remove(image_path)
                     shutil.copy2(backup_path, image_path)
                     os.remove(backup_path)
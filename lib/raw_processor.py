@@ -103,45 +103,67 @@ def apply_lens_correction_if_available(raw_image_obj, image_rgb_array):
         return image_rgb_array
 
 
+def decode_raw_image_to_rgb_array(raw_image_input_path):
+    """Demosaics a RAW file (with lens correction when available) to a 16-bit RGB array."""
+    with rawpy.imread(raw_image_input_path) as raw_data:
+        # First try with auto brightness and scaling
+        try:
+            params = rawpy.Params(
+                demosaic_algorithm=rawpy.DemosaicAlgorithm.AAHD,
+                use_camera_wb=True,
+                no_auto_bright=False,
+                no_auto_scale=False,
+                output_bps=16,
+                bright=1.0
+            )
+            
+            # Try to set sharpen threshold if available
+            if hasattr(params, 'sharpen_threshold'):
+                params.sharpen_threshold = 3000
+            
+            rgb_pixels = raw_data.postprocess(params=params)
+            
+        except Exception as proc_error:
+            print(f"    Warning: First processing attempt failed ({proc_error}), trying with no auto scaling")
+            # Fallback to more conservative processing
+            params = rawpy.Params(
+                demosaic_algorithm=rawpy.DemosaicAlgorithm.AAHD,
+                use_camera_wb=True,
+                no_auto_bright=True,
+                no_auto_scale=True,
+                output_bps=16,
+                bright=1.0
+            )
+            rgb_pixels = raw_data.postprocess(params=params)
+            # Manually scale if needed
+            rgb_pixels = (rgb_pixels / rgb_pixels.max() * (2**16-1)).astype(np.uint16)
+        
+        return apply_lens_correction_if_available(raw_data, rgb_pixels)
+
+def decode_raw_image_to_bgr_array(raw_image_input_path):
+    """
+    Decodes a RAW file to the 8-bit BGR array cv2.imread would return for the TIFF that
+    convert_raw_image_to_tiff writes, without writing or reading that file.
+    """
+    print(f"  Decoding RAW: {os.path.basename(raw_image_input_path)}")
+    try:
+        rgb_pixels = decode_raw_image_to_rgb_array(raw_image_input_path)
+    except rawpy.LibRawIOError as e: 
+        print(f"  ERROR during RAW decoding (I/O or format issue) for {raw_image_input_path}: {e}")
+        raise 
+    except Exception as e:
+        print(f"  ERROR during RAW decoding for {raw_image_input_path}: {e}")
+        raise
+    if rgb_pixels.dtype == np.uint16:
+        # Same rounding as OpenCV's 16 to 8 bit conversion on load (scale by 1/256, round half to even)
+        rgb_pixels = np.clip(np.rint(rgb_pixels.astype(np.float32) * (1.0 / 256.0)), 0, 255)
+    return np.ascontiguousarray(rgb_pixels.astype(np.uint8)[..., ::-1])
+
 def convert_raw_image_to_tiff(raw_image_input_path, tiff_output_path):
     print(f"  Converting RAW: {os.path.basename(raw_image_input_path)} to TIFF: {os.path.basename(tiff_output_path)}")
     try:
-        with rawpy.imread(raw_image_input_path) as raw_data:
-            # First try with auto brightness and scaling
-            try:
-                params = rawpy.Params(
-                    demosaic_algorithm=rawpy.DemosaicAlgorithm.AAHD,
-                    use_camera_wb=True,
-                    no_auto_bright=False,
-                    no_auto_scale=False,
-                    output_bps=16,
-                    bright=1.0
-                )
-                
-                # Try to set sharpen threshold if available
-                if hasattr(params, 'sharpen_threshold'):
-                    params.sharpen_threshold = 3000
-                
-                rgb_pixels = raw_data.postprocess(params=params)
-                
-            except Exception as proc_error:
-                print(f"    Warning: First processing attempt failed ({proc_error}), trying with no auto scaling")
-                # Fallback to more conservative processing
-                params = rawpy.Params(
-                    demosaic_algorithm=rawpy.DemosaicAlgorithm.AAHD,
-                    use_camera_wb=True,
-                    no_auto_bright=True,
-                    no_auto_scale=True,
-                    output_bps=16,
-                    bright=1.0
-                )
-                rgb_pixels = raw_data.postprocess(params=params)
-                # Manually scale if needed
-                rgb_pixels = (rgb_pixels / rgb_pixels.max() * (2**16-1)).astype(np.uint16)
-            
-            processed_rgb_pixels = apply_lens_correction_if_available(raw_data, rgb_pixels)
-            
-            imageio.imwrite(tiff_output_path, processed_rgb_pixels, format='TIFF')
+        processed_rgb_pixels = decode_raw_image_to_rgb_array(raw_image_input_path)
+        imageio.imwrite(tiff_output_path, processed_rgb_pixels, format='TIFF')
         print(f"    Successfully converted RAW to TIFF: {tiff_output_path}")
         return tiff_output_path
     except rawpy.LibRawIOError as e: 
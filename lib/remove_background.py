@@ -21,21 +21,21 @@ def detect_dominant_corner_background_color(image_bgr_array, corner_fraction=0.7
         image_bgr_array[img_height - sample_size:img_height, img_width - sample_size:img_width]
     ]
 
-    all_corner_pixels = []
+    # Sum each corner in NumPy rather than collecting every pixel in a Python list; the
+    # corners overlap when corner_fraction > 0.5 and overlapping pixels count once per corner
+    pixel_count = 0
+    bgr_sum = np.zeros(3, dtype=np.float64)
     for section in corner_sections_list:
         if section.size > 0:
-            # Reshape to a list of pixels (each pixel is a BGR tuple)
             reshaped_section = section.reshape(-1, 3)
-            all_corner_pixels.extend(reshaped_section)
+            bgr_sum += reshaped_section.sum(axis=0, dtype=np.float64)
+            pixel_count += reshaped_section.shape[0]
 
-    if not all_corner_pixels:
+    if pixel_count == 0:
         return (0, 0, 0) # Fallback if no valid corner sections
 
-    # Convert to a NumPy array for easier averaging
-    all_corner_pixels_np = np.array(all_corner_pixels)
-
     # Calculate the mean BGR values across all sampled corner pixels
-    average_bgr_color = np.mean(all_corner_pixels_np, axis=0).astype(int)
+    average_bgr_color = (bgr_sum / pixel_count).astype(int)
 
     # Ensure the values are within the 0-255 range
     average_bgr_color_tuple = tuple(np.clip(average_bgr_color, 0, 255))
@@ -46,8 +46,11 @@ def extract_pixel_runs_from_scanline_data(scanline_data_array, binarization_cuto
             })
     return list_of_pixel_runs
 
-def estimate_pixels_per_centimeter_from_ruler(image_file_path, ruler_position="top"): # ruler_position parameter IS DEFINED HERE
-    input_image_array = cv2.imread(image_file_path)
+def estimate_pixels_per_centimeter_from_ruler(image_file_path, ruler_position="top", preloaded_image_array=None): # ruler_position parameter IS DEFINED HERE
+    # Callers that already decoded the image pass it in to skip a second full read
+    input_image_array = preloaded_image_array
+    if input_image_array is None:
+        input_image_array = cv2.imread(image_file_path)
     if input_image_array is None:
         raise FileNotFoundError(f"Image file not found: {image_file_path}")
 
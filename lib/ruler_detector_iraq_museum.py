@@ -2,20 +2,22 @@ import cv2
 import numpy as np
 import os
 
-def detect_1cm_distance_iraq(image_path):
+def detect_1cm_distance_iraq(image_path, preloaded_image_array=None):
     """
     Detects the pixel distance corresponding to 1 cm on a ruler in an image,
     specifically for the Iraq Museum style ruler (lower-left corner, vertical ticks, "1 cm" text).
 
     Args:
         image_path (str): Path to the image containing the ruler.
+        preloaded_image_array (numpy.ndarray, optional): The already decoded BGR image;
+            image_path is then only used in messages.
 
     Returns:
         float: Pixel distance representing 1 cm, or None if not found.
     """
     try:
         # 1. Load the image
-        img = cv2.imread(image_path)
+        img = preloaded_image_array if preloaded_image_array is not None else cv2.imread(image_path)
         if img is None:
             print(f"Error: Could not load image at {image_path}")
             return None